@@ -0,0 +1,132 @@
+import json
+from typing import Dict, List, Union
+
+import numpy as np
+import pyarrow as pa
+from pandas import DataFrame, DatetimeIndex, Timestamp
+
+from stocker.providers import DataProvider
+
+# The key of the schema metadata describing what a table holds
+METADATA_KEY = b'stocker'
+
+
+def histories_to_table(histories: Dict[str, DataFrame], metadata: dict=None) -> pa.Table:
+    """
+    Converts the histories of several tickers into one Arrow table with Ticker, Date and a column per field, in
+    which each ticker's rows are next to each other. Rows with no values, such as the gaps in a Panel's frames,
+    are left out, and NaNs stay NaNs rather than becoming nulls, so the columns can be read without copying.
+
+    Parameters:
+        histories (Dict[str, DataFrame]): The date-indexed OHLCV data of each ticker.
+        metadata (dict): Anything else to keep in the schema, such as a Market's risk-free ticker and dates.
+    """
+    frames = {}
+    for ticker, frame in histories.items():
+        missing = frame.isna().all(axis=1)
+        frames[ticker] = frame[~missing] if missing.any() else frame
+    fields = list(dict.fromkeys(c for f in frames.values() for c in f.columns))
+    lengths = [len(f) for f in frames.values()]
+
+    tickers = pa.DictionaryArray.from_arrays(np.repeat(np.arange(len(frames), dtype=np.int32), lengths), list(frames))
+    dates = np.concatenate([f.index.to_numpy(dtype='datetime64[ns]') for f in frames.values()] or [np.empty(0, 'datetime64[ns]')])
+    columns = {'Ticker': tickers, 'Date': pa.array(dates, type=pa.timestamp('ns'))}
+    for field in fields:
+        values = [f[field].to_numpy(dtype=float) if field in f.columns else np.full(len(f), np.nan) for f in frames.values()]
+        columns[field] = pa.array(np.concatenate(values or [np.empty(0)]))
+
+    described = dict(metadata or {}, tickers=list(frames), offsets=np.concatenate([[0], np.cumsum(lengths)]).tolist())
+    return pa.table(columns).replace_schema_metadata({METADATA_KEY: json.dumps(described)})
+
+
+def write_feather(table: pa.Table, path: str):
+    """
+    Writes a table as an uncompressed Feather (Arrow IPC) file, which readers can memory-map and use in place.
+    """
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_feather(path: str) -> pa.Table:
+    """
+    Memory-maps a Feather file. The table's columns are backed by the file's pages rather than read into memory.
+    """
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def to_ipc_stream(table: pa.Table) -> pa.Buffer:
+    """
+    Serializes a table as an Arrow IPC stream, for sending to another service.
+    """
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def from_ipc_stream(buffer: Union[bytes, pa.Buffer]) -> pa.Table:
+    """
+    Reads a table from an Arrow IPC stream. The columns point into the buffer rather than being copied.
+    """
+    return pa.ipc.open_stream(pa.py_buffer(buffer) if isinstance(buffer, bytes) else buffer).read_all()
+
+
+def read_table(source: Union[pa.Table, str, bytes]) -> pa.Table:
+    """
+    A table given as itself, the path of a Feather file, which is memory-mapped, or the bytes of an IPC stream.
+    """
+    if isinstance(source, pa.Table):
+        return source
+    if isinstance(source, str):
+        return read_feather(source)
+    return from_ipc_stream(source)
+
+
+class ArrowProvider(DataProvider):
+    """
+    A provider over a table written by histories_to_table, such as a Feather file exported from a Stock or
+    Market. Histories are DataFrames whose columns are views of the table's buffers.
+
+    Attributes:
+        table (Table): The data of every ticker.
+        metadata (dict): What the table's schema says it holds, including its tickers.
+    """
+    def __init__(self, table: pa.Table):
+        if any(c.num_chunks > 1 for c in table.columns):
+            table = table.combine_chunks()
+        self.table = table
+        self.metadata = json.loads(table.schema.metadata[METADATA_KEY])
+        self._offsets = dict(zip(self.metadata['tickers'], zip(self.metadata['offsets'][:-1], self.metadata['offsets'][1:])))
+        self._fields = [n for n in table.column_names if n not in ('Ticker', 'Date')]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self._offsets)} tickers)"
+
+    @classmethod
+    def open(cls, path: str) -> 'ArrowProvider':
+        """
+        Memory-maps a Feather file written by write_feather.
+        """
+        return cls(read_feather(path))
+
+    @property
+    def tickers(self) -> List:
+        return self.metadata['tickers']
+
+    @staticmethod
+    def _numpy(column: pa.ChunkedArray) -> np.ndarray:
+        if column.num_chunks == 0:
+            return np.empty(0, dtype=column.type.to_pandas_dtype())
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        if symbol not in self._offsets:
+            raise KeyError(f"No data for {symbol!r} in the table")
+        lo, hi = self._offsets[symbol]
+        dates = self._numpy(self.table.column('Date'))
+        # Dates are sorted within each ticker's rows
+        first = lo + dates[lo:hi].searchsorted(Timestamp(start).to_datetime64(), side='left')
+        hi = lo + dates[lo:hi].searchsorted(Timestamp(end).to_datetime64(), side='left')
+        lo = first
+        index = DatetimeIndex(dates[lo:hi], name='Date')
+        return DataFrame({f: self._numpy(self.table.column(f))[lo:hi] for f in self._fields}, index=index, copy=False)
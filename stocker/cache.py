@@ -0,0 +1,269 @@
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Callable, Dict, List
+
+import pandas
+from pandas import DataFrame, Timestamp, concat, get_option, read_parquet
+
+from stocker.providers import DataProvider
+
+
+def merge_intervals(intervals: List) -> List:
+    """
+    Merges overlapping or touching [start, end) date intervals.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_intervals(intervals: List, start: str, end: str) -> List:
+    """
+    Finds the parts of [start, end) that are not covered by any of the given merged intervals.
+    """
+    missing = []
+    for covered_start, covered_end in intervals:
+        if covered_end <= start:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > start:
+            missing.append((start, covered_start))
+        start = max(start, covered_end)
+    if start < end:
+        missing.append((start, end))
+    return missing
+
+
+def fetch_missing(provider: DataProvider, coverage: Dict[str, List], start: str, end: str, today: str):
+    """
+    Fetches from a provider the parts of [start, end) that each symbol's stored coverage misses. Symbols missing
+    the same dates, e.g. everything in a new store, are fetched together.
+
+    Parameters:
+        provider (DataProvider): The provider to fetch from.
+        coverage (Dict[str, List]): The merged [start, end) intervals already stored for each symbol.
+        start (str): The first date wanted.
+        end (str): The date after the last one wanted.
+        today (str): The current date. The bar for today is still changing, so it is never recorded as covered
+            and is fetched again next time.
+
+    Returns:
+        (Dict[str, List], Dict[str, List]): The frames fetched for each symbol with any missing, and the
+            [start, end) intervals they now cover.
+    """
+    gaps = {}
+    for symbol, intervals in coverage.items():
+        for gap in missing_intervals(intervals, start, end):
+            gaps.setdefault(gap, []).append(symbol)
+
+    fetched, covered = {}, {}
+    for (gap_start, gap_end), group in gaps.items():
+        for symbol, frame in provider.histories(group, gap_start, gap_end).items():
+            fetched.setdefault(symbol, []).append(frame)
+            covered.setdefault(symbol, [])
+            if min(gap_end, today) > gap_start:
+                covered[symbol].append([gap_start, min(gap_end, today)])
+    return fetched, covered
+
+
+class ParquetCache(DataProvider):
+    """
+    A provider that keeps the histories fetched from another provider in SYMBOL.parquet files and only asks the
+    other provider for the dates it has not seen yet. The dates each file covers are kept next to it in
+    SYMBOL.json, since weekends and holidays leave no rows behind.
+
+    Bars dated today or later are never recorded as covered, so the still-changing most recent bar is fetched
+    again on every request and overwrites the cached one.
+
+    Attributes:
+        provider (DataProvider): The provider to fetch missing dates from.
+        directory (str): The directory holding the cache files.
+        clock (Callable): Returns the current datetime.
+    """
+    def __init__(self, provider: DataProvider, directory: str, clock: Callable=datetime.now):
+        self.provider = provider
+        self.directory = directory
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.provider!r}, {self.directory!r})"
+
+    def _paths(self, symbol: str):
+        base = os.path.join(self.directory, symbol)
+        return base + '.parquet', base + '.json'
+
+    def load(self, symbol: str):
+        """
+        Reads the cached history of a stock and the date intervals it covers.
+
+        Returns:
+            (DataFrame, List): The cached frame, or None, and the merged [start, end) intervals.
+        """
+        data_path, coverage_path = self._paths(symbol)
+        if not os.path.exists(data_path) or not os.path.exists(coverage_path):
+            return None, []
+        with open(coverage_path) as f:
+            coverage = json.load(f)
+        return read_parquet(data_path), coverage
+
+    def store(self, symbol: str, frame: DataFrame, coverage: List):
+        """
+        Writes the history of a stock and the date intervals it covers, replacing any earlier files.
+        """
+        data_path, coverage_path = self._paths(symbol)
+        frame.to_parquet(data_path + '.tmp')
+        os.replace(data_path + '.tmp', data_path)
+        with open(coverage_path + '.tmp', 'w') as f:
+            json.dump(coverage, f)
+        os.replace(coverage_path + '.tmp', coverage_path)
+
+    def invalidate(self, symbol: str):
+        """
+        Removes a stock from the cache.
+        """
+        for path in self._paths(symbol):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        return self.histories([symbol], start, end)[symbol]
+
+    def histories(self, symbols: List, start: str, end: str) -> Dict[str, DataFrame]:
+        cached = {symbol: self.load(symbol) for symbol in dict.fromkeys(symbols)}
+        fetched, covered = fetch_missing(self.provider, {s: c for s, (_, c) in cached.items()}, start, end, self.clock().strftime('%Y-%m-%d'))
+
+        histories = {}
+        for symbol, (frame, coverage) in cached.items():
+            if symbol in fetched:
+                frame = concat(([frame] if frame is not None else []) + fetched[symbol])
+                frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+                coverage = merge_intervals(coverage + covered[symbol])
+                self.store(symbol, frame, coverage)
+            elif frame is None:
+                # Nothing cached and nothing fetched, e.g. an unknown ticker or an empty date range
+                raise KeyError(f"No data for {symbol!r} from {self.provider!r}")
+            lo = frame.index.searchsorted(Timestamp(start), side='left')
+            hi = frame.index.searchsorted(Timestamp(end), side='left')
+            histories[symbol] = frame.iloc[lo:hi]
+        return histories
+
+    def info(self, symbol: str) -> dict:
+        return self.provider.info(symbol)
+
+
+def _own_copy(frame: DataFrame) -> DataFrame:
+    # With copy-on-write, the default from pandas 3, a shallow copy shares the data until either frame is
+    # modified. Before that it shares the blocks themselves, so writes would reach the cached frame
+    try:
+        copy_on_write = int(pandas.__version__.split('.')[0]) >= 3 or get_option('mode.copy_on_write') is True
+    except KeyError:
+        copy_on_write = False
+    return frame.copy(deep=not copy_on_write)
+
+
+class MemoryCache(DataProvider):
+    """
+    A provider that keeps the histories fetched from another provider in memory, evicting the least recently
+    used ones once their combined size exceeds a byte budget. Identical symbol and date range requests are then
+    only fetched once per process. Each caller gets its own copy of the cached frame, so callers may add, drop
+    or change rows and columns freely. Under copy-on-write the copy is shallow and shares the data until either
+    is modified; otherwise it is deep.
+
+    Attributes:
+        provider (DataProvider): The provider to fetch from on a miss.
+        max_bytes (int): The most memory the cached frames may use.
+        hits (int): The number of requests answered from memory.
+        misses (int): The number of requests passed on to the provider.
+    """
+    def __init__(self, provider: DataProvider, max_bytes: int=256 * 2**20):
+        self.provider = provider
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+        self._info = {}
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.provider!r}, max_bytes={self.max_bytes!r})"
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def get(self, symbol: str, start: str, end: str) -> DataFrame:
+        """
+        Looks up a cached history, marking it as the most recently used. Returns None on a miss.
+        """
+        key = (symbol, start, end)
+        with self._lock:
+            if key not in self._frames:
+                return None
+            self._frames.move_to_end(key)
+            return _own_copy(self._frames[key][0])
+
+    def put(self, symbol: str, start: str, end: str, frame: DataFrame):
+        """
+        Caches a history, evicting the least recently used ones until it fits. Frames larger than the whole
+        budget are not cached.
+        """
+        key = (symbol, start, end)
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._frames:
+                self.nbytes -= self._frames.pop(key)[1]
+            while self._frames and self.nbytes + size > self.max_bytes:
+                self.nbytes -= self._frames.popitem(last=False)[1][1]
+            self._frames[key] = (frame, size)
+            self.nbytes += size
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        with self._lock:
+            self._frames.clear()
+            self._info.clear()
+            self.nbytes = 0
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        return self.histories([symbol], start, end)[symbol]
+
+    def histories(self, symbols: List, start: str, end: str) -> Dict[str, DataFrame]:
+        histories = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            frame = self.get(symbol, start, end)
+            if frame is None:
+                missing.append(symbol)
+            else:
+                histories[symbol] = frame
+        with self._lock:
+            self.hits += len(histories)
+            self.misses += len(missing)
+
+        if missing:
+            for symbol, frame in self.provider.histories(missing, start, end).items():
+                self.put(symbol, start, end, frame)
+                histories[symbol] = _own_copy(frame)
+        # Symbols the provider has no data for are left out, as it left them out
+        return {s: histories[s] for s in dict.fromkeys(symbols) if s in histories}
+
+    def info(self, symbol: str) -> dict:
+        with self._lock:
+            if symbol in self._info:
+                return self._info[symbol]
+        info = self.provider.info(symbol)
+        with self._lock:
+            return self._info.setdefault(symbol, info)
@@ -0,0 +1,44 @@
+from typing import Callable, Dict, NamedTuple
+
+import numpy as np
+from pandas import DataFrame, Series
+
+
+class DerivedColumn(NamedTuple):
+    """
+    A column calculated from a Stock's OHLCV data.
+
+    Attributes:
+        name (str): The name of the column in Stock.history.
+        func (Callable): Takes the history DataFrame and returns the column as a Series.
+        eager (bool): Whether the column is added as soon as the history loads, rather than on first use.
+    """
+    name: str
+    func: Callable
+    eager: bool = False
+
+
+derived_columns: Dict[str, DerivedColumn] = {}
+
+
+def register_column(name: str, func: Callable, eager: bool=False):
+    """
+    Declares a derived column that every Stock can provide through Stock.column(name).
+
+    Parameters:
+        name (str): The name of the column in Stock.history.
+        func (Callable): Takes the history DataFrame and returns the column as a Series.
+        eager (bool): Whether the column is added as soon as the history loads, rather than on first use.
+    """
+    derived_columns[name] = DerivedColumn(name, func, eager)
+
+
+def _true_range(frame: DataFrame) -> Series:
+    previous = frame['Close'].shift(1)
+    return np.maximum(frame['High'], previous).fillna(frame['High']) - np.minimum(frame['Low'], previous).fillna(frame['Low'])
+
+
+register_column('Close-Open', lambda frame: frame['Close'] - frame['Open'], eager=True)
+register_column('High-Low', lambda frame: frame['High'] - frame['Low'], eager=True)
+register_column('Log Return', lambda frame: np.log(frame['Close']).diff())
+register_column('True Range', _true_range)
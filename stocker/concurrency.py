@@ -0,0 +1,193 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, List
+
+from pandas import DataFrame
+
+from stocker.providers import DataProvider
+
+
+class RateLimiter:
+    """
+    A token bucket shared by threads to cap how often requests are made.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        burst (int): The most tokens the bucket holds, i.e. how many requests may be made back to back.
+    """
+    def __init__(self, rate: float, burst: int=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.rate!r}, burst={self.burst!r})"
+
+    def acquire(self):
+        """
+        Takes one token, blocking until one is available.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ThreadedProvider(DataProvider):
+    """
+    A provider that splits large requests to another provider into batches and makes them from a pool of
+    threads, so fetching a basket takes about as long as its slowest batch rather than the sum of them all.
+
+    Attributes:
+        provider (DataProvider): The provider to make the requests to.
+        workers (int): The number of threads making requests.
+        batch_size (int): The most symbols asked for in one request.
+        limiter (RateLimiter): Gates every request, or None to make them as fast as the workers allow.
+        timeout (float): Seconds to wait for each request before raising concurrent.futures.TimeoutError,
+            or None to wait forever. The abandoned request keeps its thread until it returns.
+
+    The threads are started by the first request. Use the provider in a with block, or call close, to stop them
+    once it is no longer needed.
+    """
+    def __init__(self, provider: DataProvider, workers: int=8, batch_size: int=50, limiter: RateLimiter=None, timeout: float=None):
+        self.provider = provider
+        self.workers = workers
+        self.batch_size = batch_size
+        self.limiter = limiter
+        self.timeout = timeout
+        self._pool = None
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.provider!r}, workers={self.workers!r}, batch_size={self.batch_size!r})"
+
+    def _request(self, method, *args):
+        if self.limiter is not None:
+            self.limiter.acquire()
+        return method(*args)
+
+    def _submit(self, method, *args):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.workers)
+            return self._pool.submit(self._request, method, *args)
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        return self._submit(self.provider.history, symbol, start, end).result(self.timeout)
+
+    def histories(self, symbols: List, start: str, end: str) -> Dict[str, DataFrame]:
+        symbols = list(dict.fromkeys(symbols))
+        futures = [self._submit(self.provider.histories, symbols[i:i + self.batch_size], start, end)
+                   for i in range(0, len(symbols), self.batch_size)]
+        histories = {}
+        for future in futures:
+            histories.update(future.result(self.timeout))
+        return histories
+
+    def info(self, symbol: str) -> dict:
+        return self._submit(self.provider.info, symbol).result(self.timeout)
+
+    def close(self):
+        """
+        Shuts down the worker threads. A later request starts new ones.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def __enter__(self) -> 'ThreadedProvider':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SingleFlight(DataProvider):
+    """
+    A provider that coalesces concurrent identical requests to another provider: while a history is being
+    fetched, every other thread asking for the same symbol and date range waits for that fetch and shares its
+    result, or its exception, instead of making its own. A request for several symbols only fetches, in one
+    batch, those no other thread is already fetching. Nothing is kept once a fetch completes; put a MemoryCache
+    in front for that.
+
+    Attributes:
+        provider (DataProvider): The provider to make the requests to.
+        fetches (int): The number of symbols, or info lookups, actually requested from the provider.
+        coalesced (int): The number of them that were instead shared from a fetch already in flight.
+    """
+    def __init__(self, provider: DataProvider):
+        self.provider = provider
+        self.fetches = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.provider!r})"
+
+    def _join(self, keys: List):
+        """
+        Finds the flights already underway for some keys and starts one for each of the rest.
+
+        Returns:
+            (Dict, Dict): The futures to wait for and the futures this caller must complete, by key.
+        """
+        waiting, leading = {}, {}
+        with self._lock:
+            for key in keys:
+                if key in self._flights:
+                    waiting[key] = self._flights[key]
+                else:
+                    leading[key] = self._flights[key] = Future()
+            self.fetches += len(leading)
+            self.coalesced += len(waiting)
+        return waiting, leading
+
+    def _land(self, leading: Dict, results: Dict=None, error: BaseException=None):
+        with self._lock:
+            for key in leading:
+                del self._flights[key]
+        for key, future in leading.items():
+            if error is not None:
+                future.set_exception(error)
+            elif key in results:
+                future.set_result(results[key])
+            else:
+                future.set_exception(KeyError(f"No data for {key[1]!r}"))
+
+    def _fly(self, keys: List, fetch) -> Dict:
+        waiting, leading = self._join(keys)
+        if leading:
+            try:
+                results = fetch(list(leading))
+            except BaseException as e:
+                self._land(leading, error=e)
+                raise
+            self._land(leading, results)
+        return {key: f.result() for key, f in {**leading, **waiting}.items()}
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        return self.histories([symbol], start, end)[symbol]
+
+    def histories(self, symbols: List, start: str, end: str) -> Dict[str, DataFrame]:
+        def fetch(keys):
+            histories = self.provider.histories([k[1] for k in keys], start, end)
+            return {('history', s, start, end): h for s, h in histories.items()}
+
+        keys = [('history', s, start, end) for s in dict.fromkeys(symbols)]
+        results = self._fly(keys, fetch)
+        return {key[1]: results[key] for key in keys}
+
+    def info(self, symbol: str) -> dict:
+        key = ('info', symbol)
+        return self._fly([key], lambda keys: {key: self.provider.info(symbol)})[key]
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+def _prepare(returns: np.ndarray):
+    """
+    Centers each column on its mean, which leaves covariances unchanged but keeps the sums below accurate,
+    and zeroes missing values so they drop out of every sum.
+    """
+    x = np.asarray(returns, dtype=float)
+    present = ~np.isnan(x)
+    count = present.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(present, x, 0.0).sum(axis=0) / count
+    x = np.where(present, x - np.nan_to_num(mean), 0.0)
+    return x, present.astype(float)
+
+
+def _block(xi: np.ndarray, mi: np.ndarray, xj: np.ndarray, mj: np.ndarray, min_periods: int, correlation: bool) -> np.ndarray:
+    # Each sum only runs over the periods where both assets of a pair have a return
+    n = mi.T @ mj
+    si = xi.T @ mj
+    sj = mi.T @ xj
+    with np.errstate(invalid='ignore', divide='ignore'):
+        co = xi.T @ xj - si * sj / n
+        if correlation:
+            vi = (xi * xi).T @ mj - si * si / n
+            vj = mi.T @ (xj * xj) - sj * sj / n
+            block = np.clip(co / np.sqrt(vi * vj), -1.0, 1.0)
+        else:
+            block = co / (n - 1)
+    block[n < min_periods] = np.nan
+    return block
+
+
+def _pairwise(returns: np.ndarray, block_size: int, min_periods: int, correlation: bool) -> np.ndarray:
+    x, m = _prepare(returns)
+    n_assets = x.shape[1]
+    out = np.empty((n_assets, n_assets))
+    for i0 in range(0, n_assets, block_size):
+        i1 = min(i0 + block_size, n_assets)
+        for j0 in range(i0, n_assets, block_size):
+            j1 = min(j0 + block_size, n_assets)
+            block = _block(x[:, i0:i1], m[:, i0:i1], x[:, j0:j1], m[:, j0:j1], min_periods, correlation)
+            out[i0:i1, j0:j1] = block
+            out[j0:j1, i0:i1] = block.T
+    return out
+
+
+def cross_pairwise(a: np.ndarray, b: np.ndarray, correlation: bool=False, min_periods: int=2) -> np.ndarray:
+    """
+    Calculates the covariance, or correlation, of every column of a with every column of b, each pair over the
+    rows where both have a value. This is one block of the full matrix, for when the columns are held apart.
+
+    Parameters:
+        a (ndarray): A (periods, p) array with NaN for missing returns.
+        b (ndarray): A (periods, q) array on the same periods.
+
+    Returns:
+        ndarray: A (p, q) array.
+    """
+    xa, ma = _prepare(a)
+    xb, mb = _prepare(b)
+    return _block(xa, ma, xb, mb, min_periods, correlation)
+
+
+def covariance_matrix(returns: np.ndarray, block_size: int=512, min_periods: int=2) -> np.ndarray:
+    """
+    Calculates the sample covariance (ddof=1) of every pair of columns, each over the rows where both have a
+    value, as DataFrame.cov does. The matrix is filled a block of columns at a time, so apart from the result
+    the memory used is about that of the returns.
+
+    Parameters:
+        returns (ndarray): A (periods, assets) array with NaN for missing returns.
+        block_size (int): The number of assets in each block.
+        min_periods (int): Pairs with fewer common periods are NaN.
+    """
+    return _pairwise(returns, block_size, min_periods, correlation=False)
+
+
+def correlation_matrix(returns: np.ndarray, block_size: int=512, min_periods: int=2) -> np.ndarray:
+    """
+    Calculates the Pearson correlation of every pair of columns over the rows where both have a value, as
+    DataFrame.corr does, a block of columns at a time.
+    """
+    return _pairwise(returns, block_size, min_periods, correlation=True)
+
+
+def ledoit_wolf(returns: np.ndarray, block_size: int=512):
+    """
+    Shrinks the covariance matrix towards a multiple of the identity by the Ledoit-Wolf (2004) optimal amount,
+    which keeps it well conditioned when there are about as many assets as periods. Missing returns are
+    replaced by their column's mean. As in scikit-learn, the result is based on the biased (ddof=0) covariance.
+
+    Returns:
+        (ndarray, float): The shrunk covariance matrix and the shrinkage intensity between 0 and 1.
+    """
+    x, _ = _prepare(returns)
+    n_periods, n_assets = x.shape
+    out = np.empty((n_assets, n_assets))
+    for i0 in range(0, n_assets, block_size):
+        i1 = min(i0 + block_size, n_assets)
+        for j0 in range(i0, n_assets, block_size):
+            j1 = min(j0 + block_size, n_assets)
+            block = x[:, i0:i1].T @ x[:, j0:j1] / n_periods
+            out[i0:i1, j0:j1] = block
+            out[j0:j1, i0:i1] = block.T
+
+    target = np.trace(out) / n_assets
+    squared_norm = np.einsum('ij,ij->', out, out)
+    delta = (squared_norm - 2 * target * np.trace(out) + n_assets * target ** 2) / n_assets
+    fourth = np.sum(np.einsum('ij,ij->i', x, x) ** 2)
+    beta = (fourth / n_periods - squared_norm) / (n_assets * n_periods)
+    shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+
+    out *= 1 - shrinkage
+    out[np.diag_indices(n_assets)] += shrinkage * target
+    return out, shrinkage
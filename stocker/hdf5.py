@@ -0,0 +1,115 @@
+from typing import Dict, List
+
+import h5py
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Timestamp, concat
+
+from stocker.providers import DataProvider
+
+
+class HDF5Archive(DataProvider):
+    """
+    A provider over an HDF5 file holding long histories of many tickers. Each ticker is a group with a dates
+    dataset and a (rows, fields) values dataset, both chunked along the dates and compressed with LZF, which
+    decompresses quickly. The first date of every chunk is kept uncompressed beside them, so a date range is
+    found, and read, by decompressing only the chunks that overlap it.
+
+    Attributes:
+        path (str): The HDF5 file.
+        chunk_rows (int): The number of dates in each chunk of new datasets.
+    """
+    def __init__(self, path: str, chunk_rows: int=4096):
+        self.path = path
+        self.chunk_rows = chunk_rows
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    @property
+    def tickers(self) -> List:
+        try:
+            with h5py.File(self.path, 'r') as f:
+                return list(f.get('tickers', {}))
+        except FileNotFoundError:
+            return []
+
+    def _create(self, f: h5py.File, symbol: str, frame: DataFrame):
+        if symbol in f['tickers']:
+            del f['tickers'][symbol]
+        group = f['tickers'].create_group(symbol)
+        fields = list(frame.columns)
+        rows = self.chunk_rows
+        group.attrs['fields'] = fields
+        group.attrs['chunk_rows'] = rows
+        group.create_dataset('dates', data=frame.index.to_numpy(dtype='datetime64[ns]').astype(np.int64), maxshape=(None,), chunks=(rows,), compression='lzf', shuffle=True)
+        group.create_dataset('values', data=frame.to_numpy(dtype=float), maxshape=(None, len(fields)), chunks=(rows, len(fields)), compression='lzf', shuffle=True)
+        group.create_dataset('chunk_starts', data=group['dates'][::rows], maxshape=(None,))
+
+    def write(self, histories: Dict[str, DataFrame]):
+        """
+        Adds bars to the archive. Bars after a ticker's last stored date are appended to its datasets; bars on or
+        before it are merged with the stored ones, which are then rewritten.
+
+        Parameters:
+            histories (Dict[str, DataFrame]): The date-indexed OHLCV data of each ticker.
+        """
+        with h5py.File(self.path, 'a') as f:
+            f.require_group('tickers')
+            for symbol, frame in histories.items():
+                if not frame.index.is_monotonic_increasing:
+                    frame = frame.sort_index()
+                if symbol not in f['tickers']:
+                    self._create(f, symbol, frame)
+                    continue
+                group = f['tickers'][symbol]
+                fields = list(group.attrs['fields'])
+                dates, values = group['dates'], group['values']
+                if len(frame) == 0:
+                    continue
+                new_dates = frame.index.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+                if list(frame.columns) != fields or (len(dates) and new_dates[0] <= dates[-1]):
+                    stored = self._read(group, None, None)
+                    merged = concat([stored, frame])
+                    self._create(f, symbol, merged[~merged.index.duplicated(keep='last')].sort_index())
+                    continue
+
+                n, rows = len(dates), int(group.attrs['chunk_rows'])
+                dates.resize((n + len(frame),))
+                values.resize((n + len(frame), len(fields)))
+                dates[n:] = new_dates
+                values[n:] = frame.to_numpy(dtype=float)
+                # Record the first date of every chunk the new rows start
+                starts = group['chunk_starts']
+                first = -(-n // rows) * rows
+                new = dates[first::rows] if first < n + len(frame) else np.empty(0, dtype=np.int64)
+                starts.resize((len(starts) + len(new),))
+                starts[len(starts) - len(new):] = new
+
+    def _read(self, group: h5py.Group, start: str, end: str) -> DataFrame:
+        dates, values, fields = group['dates'], group['values'], list(group.attrs['fields'])
+        n, rows = len(dates), int(group.attrs['chunk_rows'])
+        lo, hi = 0, n
+        if start is not None or end is not None:
+            starts = group['chunk_starts'][:]
+            first_chunk = max(np.searchsorted(starts, Timestamp(start).value, side='right') - 1, 0) if start is not None else 0
+            last_chunk = np.searchsorted(starts, Timestamp(end).value, side='left') if end is not None else len(starts)
+            offset = first_chunk * rows
+            # Only the dates of the chunks that can hold the range are decompressed
+            window = dates[offset:max(min(last_chunk * rows, n), offset)]
+            lo = offset + (np.searchsorted(window, Timestamp(start).value, side='left') if start is not None else 0)
+            hi = offset + (np.searchsorted(window, Timestamp(end).value, side='left') if end is not None else len(window))
+        index = DatetimeIndex(dates[lo:hi].view('datetime64[ns]'), name='Date')
+        return DataFrame(values[lo:hi], index=index, columns=fields)
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        return self.histories([symbol], start, end)[symbol]
+
+    def histories(self, symbols: List, start: str, end: str) -> Dict[str, DataFrame]:
+        with h5py.File(self.path, 'r') as f:
+            tickers = f.get('tickers', {})
+            histories = {}
+            for symbol in dict.fromkeys(symbols):
+                if symbol not in tickers:
+                    raise KeyError(f"No data for {symbol!r} in {self.path!r}")
+                histories[symbol] = self._read(tickers[symbol], start, end)
+            return histories
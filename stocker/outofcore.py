@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+from typing import List
+
+import dask
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Series, Timestamp, concat
+
+from stocker.covariance import cross_pairwise
+from stocker.providers import DataProvider
+from stocker.returns import price_returns
+from stocker.stocker import Market, Stock
+
+
+class DaskMarket(Market):
+    """
+    A Market for universes whose histories do not fit in memory together. Nothing is downloaded when it is built:
+    the tickers are cut into partitions, and the stat matrix, market returns, covariance and correlation are each
+    a graph of dask tasks that load one or two partitions at a time and reduce them to a small result. Peak memory
+    is then about that of a partition or two per worker, whatever the size of the universe.
+
+    The Stocks keep their statistics but not their histories. Everything else a Market offers, such as returns,
+    performance, betas and rolling_stats, is calculated from the panel as usual, which loads the whole universe.
+
+    Attributes:
+        partition_size (int): The number of tickers loaded by each task.
+        workers (int): The number of dask threads. Defaults to dask's own choice.
+    """
+    def __init__(self, symbols: List, rf: str='SPTI', start: str=str((datetime.now()-timedelta(days=365))), end: str=str(datetime.now()), provider: DataProvider=None, partition_size: int=100, workers: int=None):
+        self.partition_size = partition_size
+        self.workers = workers
+        super().__init__(symbols, rf, start, end, provider)
+
+    def _initial_panel(self, tickers: List) -> None:
+        # Stocks without a history are only a ticker and some dates, so a whole exchange costs next to nothing
+        return None
+
+    def partitions(self) -> List:
+        """
+        The market's distinct tickers, cut into lists of at most partition_size.
+        """
+        tickers = list(dict.fromkeys(self.tickers))
+        return [tickers[i:i + self.partition_size] for i in range(0, len(tickers), self.partition_size)]
+
+    def _compute(self, *tasks, processes: int=None):
+        if processes:
+            return dask.compute(*tasks, scheduler='processes', num_workers=processes)
+        return dask.compute(*tasks, scheduler='threads', num_workers=self.workers)
+
+    def _load_partition(self, tickers: List) -> dict:
+        return self.provider.histories(tickers, self.start_date, self.end_date)
+
+    def _gather_stats(self, processes: int=None):
+        # Only the partitions holding a Stock whose statistics are missing are loaded
+        partitions = self.partitions()
+        where = {t: i for i, p in enumerate(partitions) for t in p}
+        pending = [partitions[i] for i in sorted({where[s.ticker] for s in self.stocks if 'columns' not in s._stats})]
+        tasks = [dask.delayed(_partition_stats)(self.provider, p, self.start_date, self.end_date) for p in pending]
+        results = self._compute(*tasks, processes=processes)
+        found = {t: r for p, rs in zip(pending, results) for t, r in zip(p, rs)}
+        for stock in self.stocks:
+            if stock.ticker in found:
+                stock._stats['columns'], return_pct = found[stock.ticker]
+                stock._stats.setdefault('return_pct', return_pct)
+
+    def calculate_stats(self, processes: int=None):
+        """
+        Calculates the market-wide metrics as the column means of the stat matrix, a partition at a time.
+
+        Parameters:
+            processes (int): When given, the partitions are loaded and reduced by this many worker processes,
+                rather than by the market's threads. The provider is then pickled to each of them.
+        """
+        if 'matrix' not in self._stats:
+            self._gather_stats(processes)
+        matrix = self.stat_matrix()
+        self._stats['means'] = Series(matrix.to_numpy().mean(axis=0), index=matrix.columns)
+
+    def stat_matrix(self, stocks: List=None) -> DataFrame:
+        """
+        Gathers the average, variance and std_dev of every column, and the return_pct, of each Stock into one
+        matrix with a row per Stock. For the market's own Stocks each partition is loaded by its own task, and
+        the statistics are also kept on the Stocks. Other Stocks are gathered as by Market.
+
+        Returns:
+            DataFrame: A row per ticker, with (family, key) columns and a ('return_pct', '') column.
+        """
+        if stocks is not None:
+            return super().stat_matrix(stocks)
+        if 'matrix' not in self._stats:
+            self._gather_stats()
+        return super().stat_matrix()
+
+    @property
+    def raw_return_pct(self) -> float:
+        if 'means' not in self._stats:
+            self.calculate_stats()
+        return self._stats['means'][('return_pct', '')]
+
+    @staticmethod
+    def _closes(histories: dict, tickers: List) -> DataFrame:
+        return concat({t: histories[t]['Close'] for t in tickers}, axis=1, sort=True)
+
+    def _partition_returns(self, tickers: List, start: str=None, end: str=None) -> DataFrame:
+        returns = price_returns(self._closes(self._load_partition(tickers), tickers))
+        lo = 0 if start is None else returns.index.searchsorted(Timestamp(start), side='left')
+        hi = len(returns) if end is None else returns.index.searchsorted(Timestamp(end), side='left')
+        return returns.iloc[lo:hi]
+
+    def _partition_sums(self, tickers: List):
+        histories = self._load_partition(tickers)
+        dates = DatetimeIndex(np.unique(np.concatenate([histories[t].index.to_numpy(dtype='datetime64[ns]') for t in tickers])))
+        returns = price_returns(self._closes(histories, tickers))
+        return dates, returns.sum(axis=1), returns.count(axis=1)
+
+    @property
+    def market_returns(self) -> Series:
+        """
+        The equal-weighted daily simple return of the market's Stocks, from each partition's sum and count of
+        returns per date.
+        """
+        if 'market_returns' not in self._stats:
+            parts = self._compute(*[dask.delayed(self._partition_sums)(p) for p in self.partitions()])
+            dates = self.risk_free._load().index
+            total, count = Series(dtype=float), Series(dtype=float)
+            for part_dates, part_total, part_count in parts:
+                dates = dates.union(part_dates)
+                total = total.add(part_total, fill_value=0)
+                count = count.add(part_count, fill_value=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                # The first of the market's dates has no return, as in Market.returns
+                mean = (total / count).reindex(dates[1:])
+            mean.index.name = 'Date'
+            self._stats['market_returns'] = mean
+        return self._stats['market_returns']
+
+    def _block(self, first: List, second: List, start: str, end: str, correlation: bool) -> np.ndarray:
+        # Each task loads its own partitions, so no more than two are held per worker
+        a = self._partition_returns(first, start, end)
+        if first == second:
+            return cross_pairwise(a.to_numpy(), a.to_numpy(), correlation)
+        b = self._partition_returns(second, start, end)
+        a, b = a.align(b, join='outer', axis=0)
+        return cross_pairwise(a.to_numpy(), b.to_numpy(), correlation)
+
+    def _pairwise(self, start: str, end: str, correlation: bool) -> DataFrame:
+        parts = self.partitions()
+        pairs = [(i, j) for i in range(len(parts)) for j in range(i, len(parts))]
+        blocks = self._compute(*[dask.delayed(self._block)(parts[i], parts[j], start, end, correlation) for i, j in pairs])
+        tickers = [t for p in parts for t in p]
+        offsets = np.cumsum([0] + [len(p) for p in parts])
+        matrix = np.empty((len(tickers), len(tickers)))
+        for (i, j), block in zip(pairs, blocks):
+            matrix[offsets[i]:offsets[i + 1], offsets[j]:offsets[j + 1]] = block
+            matrix[offsets[j]:offsets[j + 1], offsets[i]:offsets[i + 1]] = block.T
+        return DataFrame(matrix, index=tickers, columns=tickers, copy=False)
+
+    def covariance(self, start: str=None, end: str=None, shrinkage: bool=False, block_size: int=512) -> DataFrame:
+        """
+        The covariance matrix of the Stocks' daily returns, each pair over the dates where both have one. A task
+        per pair of partitions fills one block of the matrix. Ledoit-Wolf shrinkage needs every return at once,
+        so it is calculated from the panel as by Market.
+        """
+        if shrinkage:
+            return super().covariance(start, end, shrinkage, block_size)
+        key = ('covariance', start, end, shrinkage)
+        if key not in self._stats:
+            self._stats[key] = self._pairwise(start, end, correlation=False)
+        return self._stats[key]
+
+    def correlation(self, start: str=None, end: str=None, block_size: int=512) -> DataFrame:
+        """
+        The correlation matrix of the Stocks' daily returns, a block per pair of partitions, as for covariance.
+        """
+        key = ('correlation', start, end)
+        if key not in self._stats:
+            self._stats[key] = self._pairwise(start, end, correlation=True)
+        return self._stats[key]
+
+
+def _partition_stats(provider: DataProvider, tickers: List, start: str, end: str) -> List:
+    histories = provider.histories(tickers, start, end)
+    results = []
+    for t in tickers:
+        # A throwaway Stock, so its history is released with the partition
+        stock = Stock(t, start, end, history=histories[t], provider=provider)
+        results.append((stock.column_stats, stock.return_pct))
+    return results
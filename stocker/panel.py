@@ -0,0 +1,108 @@
+from typing import Dict, List
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Timestamp
+
+
+class Panel:
+    """
+    The OHLCV data of many tickers held as one date-by-ticker array per field, aligned on the union of their
+    dates. Dates on which a ticker has no data are NaN. The arrays are column-major, so each ticker's series is
+    contiguous and can be handed out as a view without copying.
+
+    Attributes:
+        dates (DatetimeIndex): The dates of the rows.
+        tickers (List): The ticker of each column.
+        fields (List): The names of the arrays, e.g. Open, High, Low, Close and Volume.
+        values (Dict[str, ndarray]): A (dates, tickers) float array for each field.
+        bounds (ndarray): The [first, last + 1) row holding data for each ticker.
+    """
+    def __init__(self, dates: DatetimeIndex, tickers: List, values: Dict, bounds: np.ndarray):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.fields = list(values)
+        self.values = values
+        self.bounds = bounds
+        self._columns = {t: j for j, t in enumerate(self.tickers)}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self.dates)} dates x {len(self.tickers)} tickers, fields={self.fields!r})"
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._columns
+
+    def column(self, ticker: str) -> int:
+        """
+        The position of a ticker's column in the arrays.
+        """
+        return self._columns[ticker]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(v.nbytes for v in self.values.values())
+
+    @classmethod
+    def from_histories(cls, histories: Dict[str, DataFrame]) -> 'Panel':
+        """
+        Copies the histories of several tickers into one panel.
+
+        Parameters:
+            histories (Dict[str, DataFrame]): The date-indexed OHLCV data of each ticker.
+        """
+        tickers = list(histories)
+        frames = list(histories.values())
+        fields = list(dict.fromkeys(c for f in frames for c in f.columns))
+        if frames:
+            dates = DatetimeIndex(np.unique(np.concatenate([f.index.to_numpy(dtype='datetime64[ns]') for f in frames])), name='Date')
+        else:
+            dates = DatetimeIndex([], name='Date')
+
+        values = {field: np.full((len(dates), len(tickers)), np.nan, order='F') for field in fields}
+        bounds = np.zeros((len(tickers), 2), dtype=np.int64)
+        for j, frame in enumerate(frames):
+            rows = dates.get_indexer(frame.index)
+            if len(rows):
+                bounds[j] = rows.min(), rows.max() + 1
+            for field in frame.columns:
+                values[field][rows, j] = frame[field].to_numpy(dtype=float)
+        return cls(dates, tickers, values, bounds)
+
+    def frame(self, ticker: str) -> DataFrame:
+        """
+        The history of one ticker as a DataFrame with a row for each of its own dates, like the frame it was built
+        from. Dates on which only other tickers have data are left out. The columns are views into the panel's
+        arrays unless the ticker has such gaps between its first and last date, in which case they are copied.
+        """
+        j = self._columns[ticker]
+        lo, hi = self.bounds[j]
+        columns = {f: self.values[f][lo:hi, j] for f in self.fields}
+        present = ~np.logical_and.reduce([np.isnan(c) for c in columns.values()]) if columns else np.ones(hi - lo, dtype=bool)
+        if not present.all():
+            return DataFrame({f: c[present] for f, c in columns.items()}, index=self.dates[lo:hi][present])
+        return DataFrame(columns, index=self.dates[lo:hi], copy=False)
+
+    def field(self, name: str, tickers: List=None) -> DataFrame:
+        """
+        One field of every ticker as a (dates, tickers) DataFrame. Without a subset of tickers the frame is a view
+        of the panel's array.
+        """
+        if tickers is None:
+            return DataFrame(self.values[name], index=self.dates, columns=self.tickers, copy=False)
+        return DataFrame(self.values[name][:, [self._columns[t] for t in tickers]], index=self.dates, columns=list(tickers))
+
+    def subset(self, tickers: List=None, start: str=None, end: str=None) -> 'Panel':
+        """
+        A panel of some of the tickers over the dates in [start, end). When the tickers are next to each other in
+        this panel, such as all of them, the new panel's arrays are views of this one's.
+        """
+        lo = 0 if start is None else self.dates.searchsorted(Timestamp(start), side='left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(Timestamp(end), side='left')
+        tickers = self.tickers if tickers is None else list(tickers)
+        columns = np.array([self._columns[t] for t in tickers], dtype=np.int64)
+        if len(columns) and np.array_equal(columns, np.arange(columns[0], columns[0] + len(columns))):
+            columns = slice(columns[0], columns[0] + len(columns))
+            values = {f: v[lo:hi, columns] for f, v in self.values.items()}
+        else:
+            values = {f: np.asfortranarray(v[lo:hi][:, columns]) for f, v in self.values.items()}
+        bounds = np.clip(self.bounds[columns] - lo, 0, hi - lo)
+        return Panel(self.dates[lo:hi], tickers, values, bounds)
@@ -0,0 +1,67 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List
+
+import numpy as np
+
+from stocker.panel import Panel
+from stocker.stats import ColumnStats, price_block
+
+# The panel fields copied to shared memory, in the order of the first four Stock.stat_keys
+SHARED_FIELDS = ('Open', 'Close', 'High', 'Low')
+
+
+def _shard_stats(name: str, shape: tuple, columns: List, bounds: np.ndarray, keys: List):
+    """
+    Runs in a worker process: attaches to the shared prices and calculates the statistics of a shard of tickers.
+    """
+    shm = SharedMemory(name=name)
+    prices = None
+    try:
+        prices = np.ndarray(shape, dtype=float, buffer=shm.buf)
+        results = []
+        for j, (lo, hi) in zip(columns, bounds):
+            block = price_block(*(prices[f, j, lo:hi] for f in range(len(SHARED_FIELDS))))
+            stats = ColumnStats.from_block(block, keys)
+            return_pct = (block[-1, 1] - block[0, 0]) / block[0, 0] if hi > lo else np.nan
+            results.append((stats.count, stats.total_mean, stats.m2, stats.high, stats.low, return_pct))
+        return results
+    finally:
+        del prices
+        shm.close()
+
+
+def parallel_column_stats(panel: Panel, tickers: List, keys: List, processes: int, shards_per_process: int=4) -> List:
+    """
+    Calculates the ColumnStats and return of many tickers on a pool of processes. The panel's prices are copied
+    once into shared memory, where every worker reads them in place, so only the small results are pickled.
+
+    Parameters:
+        panel (Panel): The prices of the tickers.
+        tickers (List): The tickers to calculate, in the order of the results.
+        keys (List): Stock.stat_keys, naming the statistics' columns.
+        processes (int): The number of worker processes.
+        shards_per_process (int): How many pieces each worker's share of tickers is cut into, to balance the load.
+
+    Returns:
+        List: A (ColumnStats, return_pct) pair for each ticker.
+    """
+    columns = np.array([panel.column(t) for t in tickers], dtype=np.int64)
+    shape = (len(SHARED_FIELDS), len(panel.tickers), len(panel.dates))
+    shm = SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    try:
+        prices = np.ndarray(shape, dtype=float, buffer=shm.buf)
+        for f, field in enumerate(SHARED_FIELDS):
+            # Each ticker's prices end up contiguous
+            prices[f] = panel.values[field].T
+        del prices
+
+        size = max(-(-len(columns) // (processes * shards_per_process)), 1)
+        shards = [columns[i:i + size] for i in range(0, len(columns), size)]
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [pool.submit(_shard_stats, shm.name, shape, shard, panel.bounds[shard], list(keys)) for shard in shards]
+            results = [r for future in futures for r in future.result()]
+    finally:
+        shm.close()
+        shm.unlink()
+    return [(ColumnStats(keys, *r[:5]), r[5]) for r in results]
@@ -0,0 +1,51 @@
+import numpy as np
+
+# The metrics performance_metrics calculates, in the order it returns them
+PERFORMANCE_METRICS = ('sharpe', 'sortino', 'treynor', 'jensens_alpha', 'information_ratio', 'tracking_error', 'beta')
+
+
+def performance_metrics(excess: np.ndarray, market_excess: np.ndarray, periods_per_year: int=252) -> dict:
+    """
+    Calculates risk-adjusted performance metrics of many assets against a market at once, from their returns
+    over the risk-free asset's. Each asset only uses the periods where it and the market both have an excess
+    return, and every metric comes from one set of sums over those periods. Ratios and alphas are annualized.
+
+    Parameters:
+        excess (ndarray): A (periods, assets) array of simple returns minus the risk-free return.
+        market_excess (ndarray): The market's return minus the risk-free return for each period.
+        periods_per_year (int): Used to annualize, 252 for daily returns.
+
+    Returns:
+        dict: An array with a value per asset for each of PERFORMANCE_METRICS.
+    """
+    mask = ~np.isnan(excess) & ~np.isnan(market_excess)[:, None]
+    n = mask.sum(axis=0).astype(float)
+    market_excess = np.where(mask, market_excess[:, None], 0.0)
+    excess = np.where(mask, excess, 0.0)
+    # The risk-free return cancels out of the return over the market's
+    active = excess - market_excess
+    downside = np.minimum(excess, 0.0)
+
+    sum_e, sum_m, sum_a = excess.sum(axis=0), market_excess.sum(axis=0), active.sum(axis=0)
+    sum_ee = np.einsum('ij,ij->j', excess, excess)
+    sum_mm = np.einsum('ij,ij->j', market_excess, market_excess)
+    sum_em = np.einsum('ij,ij->j', excess, market_excess)
+    sum_aa = np.einsum('ij,ij->j', active, active)
+    sum_dd = np.einsum('ij,ij->j', downside, downside)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_e, mean_m, mean_a = sum_e / n, sum_m / n, sum_a / n
+        std_e = np.sqrt(np.maximum(sum_ee - n * mean_e ** 2, 0.0) / (n - 1))
+        std_a = np.sqrt(np.maximum(sum_aa - n * mean_a ** 2, 0.0) / (n - 1))
+        beta = (sum_em - n * mean_e * mean_m) / (sum_mm - n * mean_m ** 2)
+        root = np.sqrt(periods_per_year)
+        tracking_error = std_a * root
+        return {
+            'sharpe': mean_e / std_e * root,
+            'sortino': mean_e / np.sqrt(sum_dd / n) * root,
+            'treynor': mean_e * periods_per_year / beta,
+            'jensens_alpha': (mean_e - beta * mean_m) * periods_per_year,
+            'information_ratio': mean_a * periods_per_year / tracking_error,
+            'tracking_error': tracking_error,
+            'beta': beta,
+        }
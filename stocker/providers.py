@@ -0,0 +1,186 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List
+
+from pandas import DataFrame, MultiIndex, Timestamp, read_csv, read_parquet
+from yfinance import Ticker
+from yfinance import download
+
+from stocker.panel import Panel
+
+
+def batch_download(symbols: List, start: str, end: str, downloader: Callable=download) -> Dict[str, DataFrame]:
+    """
+    Retrieves the history of several stocks with a single request.
+
+    Parameters:
+        symbols (List): The stock ticker symbols to retrieve.
+        start (str): A date in yyyy-mm-dd format. This data is the beginning of a period of time to query stock data.
+        end (str): A date in yyyy-mm-dd format. This data is the end of a period of time to query stock data.
+        downloader (Callable): A function with the signature of yfinance.download.
+
+    Returns:
+        Dict[str, DataFrame]: The history of each symbol, sliced out of the combined download rather than copied.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    frame = downloader(tickers=symbols, start=start, end=end, group_by='ticker')
+    if not isinstance(frame.columns, MultiIndex):
+        # A single ticker comes back without the ticker level
+        return {symbols[0]: frame}
+
+    histories = {}
+    for symbol in symbols:
+        history = frame[symbol]
+        # The combined index is the union of every ticker's dates
+        missing = history.isna().all(axis=1)
+        if missing.any():
+            history = history[~missing]
+        histories[symbol] = history
+    return histories
+
+
+class DataProvider(ABC):
+    """
+    This is the interface Stock, Market and Pony use to retrieve stock data.
+    """
+    @abstractmethod
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        """
+        Retrieves the daily OHLCV data of a stock.
+
+        Parameters:
+            symbol (str): A stock ticker symbol.
+            start (str): A date in yyyy-mm-dd format. The first day of data to retrieve.
+            end (str): A date in yyyy-mm-dd format. The day after the last day of data to retrieve.
+
+        Returns:
+            DataFrame: A date-indexed frame with Open, High, Low, Close and Volume columns.
+        """
+
+    def histories(self, symbols: List, start: str, end: str) -> Dict[str, DataFrame]:
+        """
+        Retrieves the daily OHLCV data of several stocks. Providers that can batch requests should override this.
+
+        Parameters:
+            symbols (List): The stock ticker symbols to retrieve.
+            start (str): A date in yyyy-mm-dd format. The first day of data to retrieve.
+            end (str): A date in yyyy-mm-dd format. The day after the last day of data to retrieve.
+
+        Returns:
+            Dict[str, DataFrame]: The history of each symbol.
+        """
+        return {s: self.history(s, start, end) for s in dict.fromkeys(symbols)}
+
+    def panel(self, symbols: List, start: str, end: str) -> Panel:
+        """
+        Retrieves the daily OHLCV data of several stocks as one Panel, in the order of the symbols. Providers that
+        already hold their data as arrays can override this to avoid copying it.
+        """
+        histories = self.histories(symbols, start, end)
+        return Panel.from_histories({s: histories[s] for s in dict.fromkeys(symbols)})
+
+    def info(self, symbol: str) -> dict:
+        """
+        Retrieves descriptive metadata of a stock. Providers without metadata return an empty dict.
+
+        Parameters:
+            symbol (str): A stock ticker symbol.
+        """
+        return {}
+
+
+class YahooProvider(DataProvider):
+    """
+    A provider that retrieves data from Yahoo! Finance through yfinance.
+
+    Attributes:
+        downloader (Callable): A function with the signature of yfinance.download.
+    """
+    def __init__(self, downloader: Callable=download):
+        self.downloader = downloader
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        return self.histories([symbol], start, end)[symbol]
+
+    def histories(self, symbols: List, start: str, end: str) -> Dict[str, DataFrame]:
+        return batch_download(symbols, start, end, self.downloader)
+
+    def info(self, symbol: str) -> dict:
+        return Ticker(symbol).info
+
+
+class LocalProvider(DataProvider):
+    """
+    A provider that reads OHLCV data from a directory of SYMBOL.parquet or SYMBOL.csv files, such as those
+    written by DataFrame.to_parquet or DataFrame.to_csv on a Stock's history.
+
+    Attributes:
+        directory (str): The directory holding the files.
+    """
+    extensions = ('.parquet', '.csv')
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.directory!r})"
+
+    def path(self, symbol: str) -> str:
+        """
+        Finds the file holding a stock's data, preferring Parquet over CSV.
+        """
+        for ext in self.extensions:
+            path = os.path.join(self.directory, symbol + ext)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No data for {symbol!r} in {self.directory!r}")
+
+    def read(self, symbol: str) -> DataFrame:
+        """
+        Reads the full history of a stock from disk.
+        """
+        path = self.path(symbol)
+        if path.endswith('.parquet'):
+            frame = read_parquet(path)
+            if 'Date' in frame.columns:
+                frame = frame.set_index('Date')
+        else:
+            frame = read_csv(path, index_col=0, parse_dates=True)
+        if not frame.index.is_monotonic_increasing:
+            frame = frame.sort_index()
+        return frame
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        frame = self.read(symbol)
+        lo = frame.index.searchsorted(Timestamp(start), side='left')
+        hi = frame.index.searchsorted(Timestamp(end), side='left')
+        return frame.iloc[lo:hi]
+
+
+_default_provider = None
+
+
+def get_default_provider() -> DataProvider:
+    """
+    Returns the provider used when a Stock, Market or Pony is not given one. Unless replaced, this is a
+    process-wide MemoryCache in front of Yahoo! Finance, so every object shares the histories already fetched,
+    and threads missing the cache for the same history at once share a single download.
+    """
+    from stocker.cache import MemoryCache
+    from stocker.concurrency import SingleFlight
+
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = MemoryCache(SingleFlight(YahooProvider()))
+    return _default_provider
+
+
+def set_default_provider(provider: DataProvider):
+    """
+    Replaces the provider used when a Stock, Market or Pony is not given one, e.g. a LocalProvider for offline jobs.
+    """
+    global _default_provider
+    _default_provider = provider
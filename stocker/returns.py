@@ -0,0 +1,44 @@
+import numpy as np
+from pandas import DataFrame
+
+# The kinds of return series price_returns, Stock.returns and Market.returns provide
+RETURN_KINDS = ('simple', 'log', 'cumulative')
+
+
+def simple_returns(prices: DataFrame) -> DataFrame:
+    """
+    Calculates the return of each period from prices, dropping the first period. A price missing on some
+    dates, e.g. where tickers with different trading days were aligned, gets no return on those dates and the
+    next price's return is taken from the last one seen.
+
+    Parameters:
+        prices (DataFrame): Date-indexed prices, or a Series of them.
+    """
+    return (prices / prices.ffill().shift(1) - 1).iloc[1:]
+
+
+def log_returns(prices: DataFrame) -> DataFrame:
+    """
+    Calculates the continuously compounded return of each period from prices, dropping the first period.
+    """
+    return np.log1p(simple_returns(prices))
+
+
+def cumulative_returns(prices: DataFrame) -> DataFrame:
+    """
+    Calculates the return from the first price to each later one, skipping missing prices.
+    """
+    return (1 + simple_returns(prices)).cumprod() - 1
+
+
+def price_returns(prices: DataFrame, kind: str='simple') -> DataFrame:
+    """
+    Calculates one of the RETURN_KINDS of return series from prices.
+    """
+    if kind == 'simple':
+        return simple_returns(prices)
+    if kind == 'log':
+        return log_returns(prices)
+    if kind == 'cumulative':
+        return cumulative_returns(prices)
+    raise ValueError(f"kind must be one of {RETURN_KINDS}, not {kind!r}")
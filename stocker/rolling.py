@@ -0,0 +1,97 @@
+from typing import List
+
+import numpy as np
+from pandas import DataFrame, MultiIndex
+
+# The statistics rolling_frame calculates for every window, named as on Stock
+ROLLING_FAMILIES = ('average', 'variance', 'std_dev', 'max', 'min')
+
+
+def _counts(present: np.ndarray, window: int) -> np.ndarray:
+    total = np.cumsum(present, axis=0, dtype=float)
+    total[window:] -= total[:-window].copy()
+    return total
+
+
+def rolling_moments(block: np.ndarray, window: int, min_periods: int=None):
+    """
+    Calculates the mean, sample variance and standard deviation of every column over a trailing window ending
+    at each row, from running sums, so the cost does not grow with the window. NaNs are skipped, and rows with
+    fewer than min_periods values in their window are NaN.
+
+    Parameters:
+        block (ndarray): A (rows, columns) array of floats.
+        window (int): The number of rows in each window.
+        min_periods (int): Defaults to the whole window, as in pandas.
+
+    Returns:
+        (ndarray, ndarray, ndarray): The mean, variance and standard deviation, each shaped like block.
+    """
+    min_periods = window if min_periods is None else min_periods
+    present = ~np.isnan(block)
+    count = _counts(present, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Centering on the column means keeps the running sums from losing precision
+        center = np.where(present, block, 0.0).sum(axis=0) / present.sum(axis=0)
+        values = np.where(present, block - np.nan_to_num(center), 0.0)
+        total = _counts(values, window)
+        squares = _counts(values * values, window)
+        mean = total / count
+        variance = np.maximum(squares - total * mean, 0.0) / (count - 1)
+        mean += np.nan_to_num(center)
+    mean[count < max(min_periods, 1)] = np.nan
+    variance[count < max(min_periods, 2)] = np.nan
+    return mean, variance, np.sqrt(variance)
+
+
+def rolling_max(block: np.ndarray, window: int, min_periods: int=None) -> np.ndarray:
+    """
+    Calculates the maximum of every column over a trailing window ending at each row. Like a monotonic deque,
+    this takes a constant number of operations per row whatever the window, but it works on every column at
+    once: the rows are cut into window-sized pieces, and each window's maximum is that of the suffix of one
+    piece and the prefix of the next (van Herk/Gil-Werman).
+
+    Parameters:
+        block (ndarray): A (rows, columns) array of floats.
+        window (int): The number of rows in each window.
+        min_periods (int): Defaults to the whole window, as in pandas.
+    """
+    min_periods = window if min_periods is None else min_periods
+    rows, cols = block.shape
+    present = ~np.isnan(block)
+    pieces = -(-rows // window)
+    padded = np.full((pieces * window, cols), -np.inf)
+    padded[:rows] = np.where(present, block, -np.inf)
+    shaped = padded.reshape(pieces, window, cols)
+    prefix = np.maximum.accumulate(shaped, axis=1).reshape(-1, cols)
+    suffix = np.maximum.accumulate(shaped[:, ::-1], axis=1)[:, ::-1].reshape(-1, cols)
+
+    out = np.empty((rows, cols))
+    head = min(window - 1, rows)
+    out[:head] = np.maximum.accumulate(padded[:head], axis=0)
+    out[head:] = np.maximum(suffix[:rows - head], prefix[head:rows])
+    out[_counts(present, window) < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rolling_min(block: np.ndarray, window: int, min_periods: int=None) -> np.ndarray:
+    """
+    Calculates the minimum of every column over a trailing window ending at each row, as rolling_max does.
+    """
+    return -rolling_max(-block, window, min_periods)
+
+
+def rolling_frame(block: np.ndarray, index, columns: List, windows: List, min_periods: int=None) -> DataFrame:
+    """
+    Calculates every ROLLING_FAMILIES statistic of every column for each window.
+
+    Returns:
+        DataFrame: A row per row of block and a (window, family, column) column for each statistic.
+    """
+    parts = []
+    for window in windows:
+        mean, variance, std_dev = rolling_moments(block, window, min_periods)
+        parts += [mean, variance, std_dev, rolling_max(block, window, min_periods), rolling_min(block, window, min_periods)]
+    labels = MultiIndex.from_product([list(windows), ROLLING_FAMILIES, list(columns)], names=['window', 'family', 'column'])
+    values = np.hstack(parts) if parts else np.empty((len(index), 0))
+    return DataFrame(values, index=index, columns=labels)
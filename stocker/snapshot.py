@@ -0,0 +1,233 @@
+import json
+import os
+import pickle
+import zlib
+from datetime import datetime, timedelta
+from typing import Callable, Union
+
+import pyarrow as pa
+from pandas import DataFrame
+
+from stocker.arrow import ArrowProvider, histories_to_table
+from stocker.performance import PERFORMANCE_METRICS
+from stocker.providers import DataProvider
+from stocker.stocker import Market, Pony, Stock
+
+# The first bytes of every snapshot file, and the version of the layout after them
+MAGIC = b'STOCKER-SNAPSHOT\n'
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(ValueError):
+    """
+    Raised for a snapshot that cannot be restored: not a snapshot, truncated or corrupt, written by another
+    version of the format or of the statistics it holds, or older than allowed.
+    """
+
+
+def _schema() -> dict:
+    # Snapshots whose statistics were laid out differently are stale even if intact
+    return {'stock': [list(Stock.stat_families), list(Stock.stat_keys)],
+            'market': [list(Market.stat_families), list(Market.stat_keys)],
+            'performance': list(PERFORMANCE_METRICS)}
+
+
+class SnapshotStock(Stock):
+    """
+    A Stock restored from a snapshot. Its statistics and metadata are only unpickled, and checked, when first
+    used, and its history is a view of the snapshot's memory-mapped Arrow data, read when first used.
+    """
+    def __init__(self, symbol: str, start: str, end: str, provider: DataProvider, restore: Callable=None):
+        super().__init__(symbol, start, end, provider=provider)
+        self._restore = restore
+
+    @property
+    def _stats(self) -> dict:
+        if self._restore is not None:
+            restore, self._restore = self._restore, None
+            state = restore()
+            self._saved_stats = {**state['stats'], **self._saved_stats}
+            if self._info is None:
+                self._info = state['info']
+        return self._saved_stats
+
+    @_stats.setter
+    def _stats(self, stats: dict):
+        # Replacing the statistics, e.g. with a new history, discards the saved ones
+        self._restore = None
+        self._saved_stats = stats
+
+    @property
+    def info(self) -> dict:
+        self._stats
+        return super().info
+
+
+class _Sections:
+    """
+    The sections of a snapshot file, each checked against its CRC-32 when first read.
+    """
+    def __init__(self, path: str, start: int, sections: dict):
+        self.path = path
+        self.file = pa.memory_map(path, 'r')
+        self.start = start
+        self.sections = sections
+
+    def buffer(self, name: str) -> pa.Buffer:
+        offset, length, crc = self.sections[name]
+        self.file.seek(self.start + offset)
+        # Zero-copy: the buffer is a view of the mapped file
+        buffer = self.file.read_buffer(length)
+        if zlib.crc32(buffer) != crc:
+            raise SnapshotError(f"Section {name!r} of {self.path!r} is corrupt")
+        return buffer
+
+    def unpickle(self, name: str):
+        return pickle.loads(self.buffer(name))
+
+
+class _SnapshotProvider(DataProvider):
+    """
+    The histories of a snapshot, checked and memory-mapped when any is first read.
+    """
+    def __init__(self, sections: _Sections):
+        self._sections = sections
+        self._arrow = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._sections.path!r})"
+
+    @property
+    def arrow(self) -> ArrowProvider:
+        if self._arrow is None:
+            self._arrow = ArrowProvider(pa.ipc.open_file(self._sections.buffer('histories')).read_all())
+        return self._arrow
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        return self.arrow.history(symbol, start, end)
+
+
+def _stock_state(stock: Stock) -> bytes:
+    return pickle.dumps({'stats': dict(stock._stats), 'info': stock._info}, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def save_snapshot(obj: Union[Market, Pony], path: str):
+    """
+    Writes a Market or Pony, with the histories, statistics and metadata calculated so far, to one file. The
+    histories are stored as Arrow data and everything else is pickled per Stock, so each can be restored alone.
+    The file is written to a temporary name and then moved into place.
+
+    Parameters:
+        obj (Union[Market, Pony]): What to save. A Pony is saved with its Market.
+        path (str): The file to write.
+    """
+    pony = obj if isinstance(obj, Pony) else None
+    market = pony.market if pony is not None else obj
+    # A Market has one Stock per ticker, which may also be its risk-free one
+    stocks = {f'stock:{s.ticker}': s for s in market.stocks + [market.risk_free]}
+    histories = {s.ticker: s._load() for s in stocks.values()}
+    if pony is not None and all(pony.stock is not s for s in stocks.values()):
+        stocks['pony'] = pony.stock
+        histories.setdefault(pony.stock.ticker, pony.stock._load())
+
+    sink = pa.BufferOutputStream()
+    table = histories_to_table(histories)
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    payloads = {'histories': sink.getvalue().to_pybytes(),
+                'market': pickle.dumps(market._stats, protocol=pickle.HIGHEST_PROTOCOL)}
+    payloads.update({name: _stock_state(s) for name, s in stocks.items() if s._stats or s._info is not None})
+
+    sections, offset = {}, 0
+    for name, payload in payloads.items():
+        sections[name] = [offset, len(payload), zlib.crc32(payload)]
+        offset += len(payload)
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'schema': _schema(),
+        'created': datetime.now().isoformat(),
+        'market': {'symbols': market.tickers, 'rf': market.risk_free.ticker, 'start': market.start_date, 'end': market.end_date},
+        'pony': None if pony is None else {'ticker': pony.stock.ticker, 'member': 'pony' not in stocks, 'metrics': pony._metrics},
+        'sections': sections,
+        'size': offset,
+    }
+    encoded = json.dumps(header).encode()
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, 'little'))
+        f.write(zlib.crc32(encoded).to_bytes(4, 'little'))
+        f.write(encoded)
+        for payload in payloads.values():
+            f.write(payload)
+    os.replace(tmp, path)
+
+
+def _read_header(path: str):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError(f"{path!r} is not a snapshot")
+        length = int.from_bytes(f.read(8), 'little')
+        crc = int.from_bytes(f.read(4), 'little')
+        encoded = f.read(length)
+    if len(encoded) != length or zlib.crc32(encoded) != crc:
+        raise SnapshotError(f"The header of {path!r} is corrupt")
+    return json.loads(encoded), len(MAGIC) + 12 + length
+
+
+def load_snapshot(path: str, max_age: timedelta=None) -> Union[Market, Pony]:
+    """
+    Restores a Market or Pony written by save_snapshot, without downloading or recalculating anything. Only the
+    market-wide statistics are unpickled now. The histories are checked and memory-mapped when any is first
+    read, and each Stock's own statistics are unpickled when it is first used. Snapshots are pickled, so only
+    load those from a trusted source.
+
+    Parameters:
+        path (str): The snapshot file.
+        max_age (timedelta): When given, snapshots written longer ago than this are refused as stale.
+
+    Returns:
+        Union[Market, Pony]: What was saved. Its provider is the snapshot's own histories.
+    """
+    header, start = _read_header(path)
+    if header['version'] != SNAPSHOT_VERSION:
+        raise SnapshotError(f"{path!r} is a version {header['version']} snapshot, not version {SNAPSHOT_VERSION}")
+    if header['schema'] != _schema():
+        raise SnapshotError(f"{path!r} holds statistics laid out by another version of stocker")
+    if max_age is not None and datetime.now() - datetime.fromisoformat(header['created']) > max_age:
+        raise SnapshotError(f"{path!r} was written on {header['created']}, more than {max_age} ago")
+    if os.path.getsize(path) != start + header['size']:
+        raise SnapshotError(f"{path!r} is truncated")
+
+    sections = _Sections(path, start, header['sections'])
+    provider = _SnapshotProvider(sections)
+    described = header['market']
+
+    def stock(name: str, ticker: str) -> SnapshotStock:
+        restore = (lambda: sections.unpickle(name)) if name in sections.sections else None
+        return SnapshotStock(ticker, described['start'], described['end'], provider, restore)
+
+    # Restored without Market.__init__, which would gather every history into a panel up front
+    market = Market.__new__(Market)
+    market.tickers = described['symbols']
+    market.provider = provider
+    restored = {t: stock(f'stock:{t}', t) for t in dict.fromkeys(described['symbols'] + [described['rf']])}
+    market.stocks = [restored[t] for t in described['symbols']]
+    market.risk_free = restored[described['rf']]
+    market.start_date = described['start']
+    market.end_date = described['end']
+    market._panel = None
+    market._stats = sections.unpickle('market')
+    if header['pony'] is None:
+        return market
+
+    saved = header['pony']
+    pony = Pony.__new__(Pony)
+    pony.market = market
+    pony.risk_free = described['rf']
+    pony.start_date = described['start']
+    pony.end_date = described['end']
+    pony.stock = restored[saved['ticker']] if saved['member'] else stock('pony', saved['ticker'])
+    pony._metrics = saved['metrics']
+    return pony
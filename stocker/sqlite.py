@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, Timestamp, concat
+
+from stocker.cache import fetch_missing, merge_intervals
+from stocker.providers import DataProvider
+
+# The columns kept for every bar, in the order of the prices table
+SQLITE_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    ticker TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    ticker TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_ticker ON coverage (ticker);
+"""
+
+
+class SQLiteStore(DataProvider):
+    """
+    A provider that keeps histories in one SQLite file, which many processes can read at once. Bars are stored
+    by (ticker, date), the table's primary key, so a date range of a ticker is one indexed range scan. The
+    database is in WAL mode, so readers are not blocked while another process writes.
+
+    Histories are written with upsert. Given another provider, the store also fetches the dates it has not seen
+    yet from it, as ParquetCache does, and records them; without one, it only answers from what is stored, so a
+    Stock using it can requery_data without touching the network.
+
+    Attributes:
+        path (str): The database file.
+        provider (DataProvider): The provider to fetch missing dates from, or None.
+        clock (Callable): Returns the current datetime.
+    """
+    def __init__(self, path: str, provider: DataProvider=None, clock: Callable=datetime.now, timeout: float=30.0):
+        self.path = path
+        self.provider = provider
+        self.clock = clock
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r}, provider={self.provider!r})"
+
+    def _connect(self) -> sqlite3.Connection:
+        # SQLite connections may not be shared between threads, or survive a fork
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self.timeout)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def close(self):
+        """
+        Closes this thread's connection to the database.
+        """
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def upsert(self, histories: Dict[str, DataFrame], coverage: Dict[str, List]=None):
+        """
+        Writes the bars of several stocks in one transaction, replacing any stored for the same dates.
+
+        Parameters:
+            histories (Dict[str, DataFrame]): The date-indexed OHLCV data of each ticker.
+            coverage (Dict[str, List]): [start, end) intervals of each ticker to record as fully stored.
+        """
+        def rows():
+            for ticker, frame in histories.items():
+                dates = frame.index.to_numpy(dtype='datetime64[ns]').astype(np.int64).tolist()
+                values = [frame[f].to_numpy(dtype=float).tolist() if f in frame.columns else [None] * len(frame) for f in SQLITE_FIELDS]
+                for row in zip([ticker] * len(frame), dates, *values):
+                    yield row
+
+        with self._connect() as db:
+            db.executemany(
+                'INSERT INTO prices VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (ticker, date) DO UPDATE SET '
+                'open = excluded.open, high = excluded.high, low = excluded.low, close = excluded.close, volume = excluded.volume',
+                rows())
+            for ticker, intervals in (coverage or {}).items():
+                merged = merge_intervals(self.coverage(ticker) + [list(i) for i in intervals])
+                db.execute('DELETE FROM coverage WHERE ticker = ?', (ticker,))
+                db.executemany('INSERT INTO coverage VALUES (?, ?, ?)', [(ticker, s, e) for s, e in merged])
+
+    def coverage(self, symbol: str) -> List:
+        """
+        The merged [start, end) intervals of a stock recorded as fully stored.
+        """
+        rows = self._connect().execute('SELECT start, end FROM coverage WHERE ticker = ? ORDER BY start', (symbol,))
+        return merge_intervals([list(r) for r in rows])
+
+    def read(self, symbol: str, start: str, end: str) -> DataFrame:
+        """
+        Reads the stored bars of a stock dated in [start, end).
+        """
+        lo = Timestamp(start).value
+        hi = Timestamp(end).value
+        rows = self._connect().execute(
+            'SELECT date, open, high, low, close, volume FROM prices WHERE ticker = ? AND date >= ? AND date < ? ORDER BY date',
+            (symbol, lo, hi)).fetchall()
+        block = np.array(rows, dtype=float).reshape(len(rows), len(SQLITE_FIELDS) + 1)
+        index = DatetimeIndex(np.array([r[0] for r in rows], dtype=np.int64).view('datetime64[ns]'), name='Date')
+        return DataFrame(block[:, 1:], index=index, columns=list(SQLITE_FIELDS))
+
+    def invalidate(self, symbol: str):
+        """
+        Removes a stock from the store.
+        """
+        with self._connect() as db:
+            db.execute('DELETE FROM prices WHERE ticker = ?', (symbol,))
+            db.execute('DELETE FROM coverage WHERE ticker = ?', (symbol,))
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        return self.histories([symbol], start, end)[symbol]
+
+    def histories(self, symbols: List, start: str, end: str) -> Dict[str, DataFrame]:
+        symbols = list(dict.fromkeys(symbols))
+        if self.provider is not None:
+            coverage = {s: self.coverage(s) for s in symbols}
+            fetched, covered = fetch_missing(self.provider, coverage, start, end, self.clock().strftime('%Y-%m-%d'))
+            if fetched:
+                self.upsert({s: concat(frames) for s, frames in fetched.items()}, covered)
+        return {s: self.read(s, start, end) for s in symbols}
+
+    def info(self, symbol: str) -> dict:
+        return self.provider.info(symbol) if self.provider is not None else {}
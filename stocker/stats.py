@@ -0,0 +1,156 @@
+from typing import List
+
+import numpy as np
+
+
+class ColumnStats:
+    """
+    The count, mean, sum of squared deviations (M2), maximum and minimum of every column of a block of data,
+    each held as one NumPy array. Missing values (NaN) are skipped, as pandas does.
+
+    Attributes:
+        columns (List): The name of each column.
+        count (ndarray): The number of values in each column.
+        total_mean (ndarray): The running mean of each column, 0 where a column has no values.
+        m2 (ndarray): The sum of squared deviations from the mean of each column.
+        high (ndarray): The maximum of each column, -inf where a column has no values.
+        low (ndarray): The minimum of each column, inf where a column has no values.
+    """
+    __slots__ = ('columns', 'count', 'total_mean', 'm2', 'high', 'low')
+
+    def __init__(self, columns: List, count, total_mean, m2, high, low):
+        self.columns = list(columns)
+        self.count = count
+        self.total_mean = total_mean
+        self.m2 = m2
+        self.high = high
+        self.low = low
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.columns!r}, count={self.count.tolist()!r})"
+
+    @classmethod
+    def empty(cls, columns: List) -> 'ColumnStats':
+        """
+        The statistics of a block without any rows.
+        """
+        k = len(columns)
+        return cls(columns, np.zeros(k), np.zeros(k), np.zeros(k), np.full(k, -np.inf), np.full(k, np.inf))
+
+    @classmethod
+    def from_block(cls, block: np.ndarray, columns: List, chunk_rows: int=4096) -> 'ColumnStats':
+        """
+        Calculates the statistics of every column of a 2D block in one pass over its rows. The rows are read a
+        chunk at a time, so each chunk is still in cache while its deviations are taken, and the chunks are
+        combined with the parallel variance formula.
+
+        Parameters:
+            block (ndarray): A (rows, columns) array of floats.
+            columns (List): The name of each column.
+            chunk_rows (int): The number of rows read at a time.
+        """
+        stats = cls.empty(columns)
+        for i in range(0, block.shape[0], chunk_rows):
+            stats = stats.merge(cls._from_chunk(block[i:i + chunk_rows], columns))
+        return stats
+
+    @classmethod
+    def _from_chunk(cls, chunk: np.ndarray, columns: List) -> 'ColumnStats':
+        missing = np.isnan(chunk)
+        if not missing.any():
+            count = np.full(chunk.shape[1], float(chunk.shape[0]))
+            mean = chunk.mean(axis=0)
+            deviation = chunk - mean
+            return cls(columns, count, mean, np.einsum('ij,ij->j', deviation, deviation), chunk.max(axis=0), chunk.min(axis=0))
+
+        present = ~missing
+        count = present.sum(axis=0).astype(float)
+        values = np.where(present, chunk, 0.0)
+        mean = np.divide(values.sum(axis=0), count, out=np.zeros_like(count), where=count > 0)
+        deviation = np.where(present, chunk - mean, 0.0)
+        return cls(columns, count, mean, np.einsum('ij,ij->j', deviation, deviation),
+                   np.where(present, chunk, -np.inf).max(axis=0), np.where(present, chunk, np.inf).min(axis=0))
+
+    def merge(self, other: 'ColumnStats') -> 'ColumnStats':
+        """
+        Combines the statistics of two blocks with the same columns into those of both blocks stacked together.
+        """
+        count = self.count + other.count
+        delta = other.total_mean - self.total_mean
+        weight = np.divide(other.count, count, out=np.zeros_like(count), where=count > 0)
+        mean = self.total_mean + delta * weight
+        m2 = self.m2 + other.m2 + delta * delta * self.count * weight
+        return ColumnStats(self.columns, count, mean, m2, np.maximum(self.high, other.high), np.minimum(self.low, other.low))
+
+    @property
+    def mean(self) -> np.ndarray:
+        return np.where(self.count > 0, self.total_mean, np.nan)
+
+    @property
+    def variance(self) -> np.ndarray:
+        """
+        The sample variance (ddof=1) of each column.
+        """
+        return np.divide(self.m2, self.count - 1, out=np.full_like(self.m2, np.nan), where=self.count > 1)
+
+    @property
+    def std_dev(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    @property
+    def max(self) -> np.ndarray:
+        return np.where(self.count > 0, self.high, np.nan)
+
+    @property
+    def min(self) -> np.ndarray:
+        return np.where(self.count > 0, self.low, np.nan)
+
+    def to_dict(self, family: str) -> dict:
+        """
+        Returns one family of statistics ('average', 'variance', 'std_dev', 'max' or 'min') keyed by column.
+        """
+        values = getattr(self, 'mean' if family == 'average' else family)
+        return dict(zip(self.columns, values))
+
+
+def price_block(open_: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """
+    Gathers the Open, Close, High and Low prices of a stock, followed by its Close-Open and High-Low, into one
+    column-major array whose columns are Stock.stat_keys.
+    """
+    block = np.empty((len(open_), 6), order='F')
+    for i, column in enumerate((open_, close, high, low)):
+        block[:, i] = column
+    np.subtract(block[:, 1], block[:, 0], out=block[:, 4])
+    np.subtract(block[:, 2], block[:, 3], out=block[:, 5])
+    return block
+
+
+def market_model(returns: np.ndarray, benchmark: np.ndarray):
+    """
+    Regresses the returns of many assets on those of a benchmark at once, using for each asset only the periods
+    where both it and the benchmark have a return.
+
+    Parameters:
+        returns (ndarray): A (periods, assets) array of returns.
+        benchmark (ndarray): The benchmark's return for each period.
+
+    Returns:
+        (ndarray, ndarray, ndarray): The alpha (intercept per period), beta and R² of each asset.
+    """
+    mask = ~np.isnan(returns) & ~np.isnan(benchmark)[:, None]
+    count = mask.sum(axis=0)
+    r = np.where(mask, returns, 0.0)
+    b = np.where(mask, benchmark[:, None], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_r = r.sum(axis=0) / count
+        mean_b = b.sum(axis=0) / count
+        dr = np.where(mask, r - mean_r, 0.0)
+        db = np.where(mask, b - mean_b, 0.0)
+        cov = np.einsum('ij,ij->j', dr, db)
+        var_r = np.einsum('ij,ij->j', dr, dr)
+        var_b = np.einsum('ij,ij->j', db, db)
+        beta = cov / var_b
+        alpha = mean_r - beta * mean_b
+        r2 = cov * cov / (var_b * var_r)
+    return alpha, beta, r2
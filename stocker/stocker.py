@@ -1,10 +1,25 @@
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List
+from functools import partial
+from typing import TYPE_CHECKING, Dict, List, Union
 
-from pandas import DataFrame
-from yfinance import Ticker
-from yfinance import download
+import numpy as np
+from pandas import DataFrame, MultiIndex, Series, Timestamp, concat
+
+from stocker.columns import derived_columns
+from stocker.covariance import correlation_matrix, covariance_matrix, ledoit_wolf
+from stocker.panel import Panel
+from stocker.parallel import parallel_column_stats
+from stocker.performance import performance_metrics
+from stocker.providers import DataProvider, get_default_provider
+from stocker.returns import price_returns
+from stocker.rolling import rolling_frame
+from stocker.stats import ColumnStats, market_model, price_block
+
+if TYPE_CHECKING:
+    # pyarrow is only needed, and imported, to export to and rebuild from Arrow data
+    import pyarrow as pa
 
 
 class Stock(ABC):
@@ -17,7 +32,7 @@ class Stock(ABC):
         end (str): A date in yyyy-mm-dd format. This data is the beginning of a period of time to query stock data.
     """
     # Initialization requires a ticker symbol
-    def __init__(self, symbol: str, start: str=str((datetime.now()-timedelta(days=365))), end: str=str(datetime.now())):
+    def __init__(self, symbol: str, start: str=str((datetime.now()-timedelta(days=365))), end: str=str(datetime.now()), history: DataFrame=None, provider: DataProvider=None):
         """
         The constructor for the Stock class.
 
@@ -25,16 +40,22 @@ class Stock(ABC):
             symbol (str): A stock ticker symbol.
             start (str): A date in yyyy-mm-dd format. This data is the beginning of a period of time to query stock data.
             end (str): A date in yyyy-mm-dd format. This data is the beginning of a period of time to query stock data.
+            history (DataFrame): Already retrieved OHLCV data for the stock. When given, no download is made.
+            provider (DataProvider): Where the stock data comes from. Defaults to get_default_provider().
         """
         # Enforce capitalization
         self._ticker = symbol.upper().split(" ")[0]
 
-        # Retrieval the financial data
-        self._history = None
+        # The financial data is only retrieved, and the metrics only calculated, when first used
+        self._history = history
+        # Makes the history when it is first used, in place of the provider, e.g. a view into a Market's panel
+        self._source = None
+        self._derived = None
+        self._info = None
+        self._stats = {}
         self.start_date = start.split(" ")[0]
         self.end_date = end.split(" ")[0]
-        self.stock_data = Ticker(self.ticker)
-        self.calculate_stats()
+        self.stock_data = provider if provider is not None else get_default_provider()
 
     def __str__(self) -> str:
         return self._ticker
@@ -42,69 +63,180 @@ class Stock(ABC):
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.ticker!r}, start={self.start_date!r}, end={self.end_date!r} )"
 
-        # Set various attributes
+    # The keys of each family of statistics
+    stat_keys = ('open', 'close', 'high', 'low', 'close-open', 'high-low')
+    stat_families = ('average', 'variance', 'std_dev', 'max', 'min')
+
     def calculate_stats(self):
         """
-        The method for calculating various metrics based on the stock's historic data.
-        """
-        self.beta = self.stock_data.info['beta']  # <--- Needs to be calculated, not pulled from website
-        c = self.history.tail(1)['Close'].item()
-        o = self.history.head(1)['Open'].item()
-        self.return_pct = ((c - o)/o)
-        self.average = {'open':self.history['Open'].mean(),
-                         'close':self.history['Close'].mean(),
-                         'high':self.history['High'].mean(),
-                         'low':self.history['Low'].mean(),
-                         'close-open':self.history['Close-Open'].mean(),
-                         'high-low':self.history['High-Low'].mean()
-                        }
-        self.variance = {'open':self.history['Open'].var(),
-                         'close':self.history['Close'].var(),
-                         'high':self.history['High'].var(),
-                         'low':self.history['Low'].var(),
-                         'close-open':self.history['Close-Open'].var(),
-                         'high-low':self.history['High-Low'].var()
-                        }
-        self.std_dev = {'open':self.history['Open'].std(),
-                         'close':self.history['Close'].std(),
-                         'high':self.history['High'].std(),
-                         'low':self.history['Low'].std(),
-                         'close-open':self.history['Close-Open'].std(),
-                         'high-low':self.history['High-Low'].std()
-                        }
-        self.max = {'open':self.history['Open'].max(),
-                    'close':self.history['Close'].max(),
-                    'high':self.history['High'].max(),
-                    'low':self.history['Low'].max(),
-                    'close-open':self.history['Close-Open'].max(),
-                    'high-low':self.history['High-Low'].max()
-                    }
-        self.min = {'open':self.history['Open'].min(),
-                    'close':self.history['Close'].min(),
-                    'high':self.history['High'].min(),
-                    'low':self.history['Low'].min(),
-                    'close-open':self.history['Close-Open'].min(),
-                    'high-low':self.history['High-Low'].min()
-                    }
-
-    @property
-    def stock_data(self) -> dict:
+        The method for calculating various metrics based on the stock's historic data. The metrics are otherwise
+        calculated the first time each is read. The regression results of Market.betas are kept, since the history
+        they came from is unchanged.
+        """
+        stats = self._stats
+        self._stats = {k: stats[k] for k in ('beta', 'alpha', 'r_squared') if k in stats}
+        self.return_pct
+        for family in self.stat_families:
+            self._stat(family)
+
+    def stat_block(self, frame: DataFrame=None) -> np.ndarray:
+        """
+        Gathers the Open, Close, High, Low, Close-Open and High-Low columns into one contiguous array.
+
+        Parameters:
+            frame (DataFrame): The OHLCV rows to gather. Defaults to the stock's whole history.
+        """
+        if frame is None:
+            frame = self._load()
+        return price_block(*(frame[col].to_numpy(dtype=float) for col in ['Open', 'Close', 'High', 'Low']))
+
+    @property
+    def column_stats(self) -> ColumnStats:
+        """
+        Every moment and extreme of the stock's columns, calculated together in one pass the first time any is read.
+        """
+        if 'columns' not in self._stats:
+            self._stats['columns'] = ColumnStats.from_block(self.stat_block(), self.stat_keys)
+        return self._stats['columns']
+
+    def _stat(self, family: str) -> dict:
+        if family not in self._stats:
+            self._stats[family] = self.column_stats.to_dict(family)
+        return self._stats[family]
+
+    @property
+    def info(self) -> dict:
+        if self._info is None:
+            self._info = self.stock_data.info(self.ticker)
+        return self._info
+
+    @property
+    def beta(self):
+        """
+        The beta calculated by Market.betas, or None.
+        """
+        return self._stats.get('beta')
+
+    @beta.setter
+    def beta(self, beta: float):
+        self._stats['beta'] = beta
+
+    @property
+    def alpha(self) -> float:
+        """
+        The alpha calculated by Market.betas, or None.
+        """
+        return self._stats.get('alpha')
+
+    @property
+    def r_squared(self) -> float:
+        """
+        The R² calculated by Market.betas, or None.
+        """
+        return self._stats.get('r_squared')
+
+    @property
+    def return_pct(self) -> float:
+        if 'return_pct' not in self._stats:
+            c = self._load()['Close'].iloc[-1].item()
+            o = self._load()['Open'].iloc[0].item()
+            self._stats['return_pct'] = ((c - o)/o)
+        return self._stats['return_pct']
+
+    def returns(self, kind: str='simple') -> Series:
+        """
+        The stock's daily return series, calculated from its closing prices once per kind.
+
+        Parameters:
+            kind (str): 'simple' or 'log' for the return of each day, or 'cumulative' for the return from the
+                first close to each later one.
+        """
+        key = ('returns', kind)
+        if key not in self._stats:
+            self._stats[key] = price_returns(self._load()['Close'], kind)
+        return self._stats[key]
+
+    def rolling_stats(self, windows: List=(20, 60, 252), min_periods: int=None) -> DataFrame:
+        """
+        The average, variance, std_dev, max and min of every column over trailing windows ending on each date,
+        for all windows at once. Each is calculated in time proportional to the history, whatever the window.
+
+        Parameters:
+            windows (List): The window lengths, in trading days.
+            min_periods (int): The fewest values a window needs. Defaults to the whole window.
+
+        Returns:
+            DataFrame: A row per date and a (window, family, key) column for each statistic.
+        """
+        key = ('rolling', tuple(windows), min_periods)
+        if key not in self._stats:
+            self._stats[key] = rolling_frame(self.stat_block(), self._load().index, self.stat_keys, windows, min_periods)
+        return self._stats[key]
+
+    @property
+    def average(self) -> dict:
+        return self._stat('average')
+
+    @property
+    def variance(self) -> dict:
+        return self._stat('variance')
+
+    @property
+    def std_dev(self) -> dict:
+        return self._stat('std_dev')
+
+    @property
+    def max(self) -> dict:
+        return self._stat('max')
+
+    @property
+    def min(self) -> dict:
+        return self._stat('min')
+
+    @property
+    def stock_data(self) -> DataProvider:
         return self._stock_data
 
     @stock_data.setter
-    def stock_data(self, data):
-        self._stock_data = data
-        self._history = download(tickers=self.ticker, start=self.start_date, end=self.end_date)
+    def stock_data(self, provider: DataProvider):
+        self._stock_data = provider
+
+    def _load(self) -> DataFrame:
+        if self._history is None:
+            if self._source is not None:
+                self._history = self._source()
+            else:
+                self._history = self.stock_data.history(self.ticker, self.start_date, self.end_date)
+        return self._history
 
     @property
     def history(self) -> DataFrame:
-        self._history['Close-Open'] = self._history['Close'] - self._history['Open']
-        self._history['High-Low'] = self._history['High'] - self._history['Low']
-        return self._history
+        """
+        The stock's data with the eager derived columns (Close-Open, High-Low) added. The columns are calculated
+        once, on a frame of the Stock's own so that cached data shared with other Stocks is left untouched.
+        """
+        if self._derived is None:
+            frame = self._load()
+            self._derived = frame.assign(**{c.name: c.func(frame) for c in derived_columns.values() if c.eager})
+        return self._derived
 
     @history.setter
     def history(self, history):
         self._history = history
+        self._derived = None
+        self._stats = {}
+
+    def column(self, name: str) -> Series:
+        """
+        Returns a column of the history, calculating and adding a registered derived column on first use.
+
+        Parameters:
+            name (str): A column of the data or a name given to stocker.columns.register_column.
+        """
+        history = self.history
+        if name not in history.columns:
+            history[name] = derived_columns[name].func(history)
+        return history[name]
 
     @property
     def ticker(self) -> str:
@@ -113,11 +245,64 @@ class Stock(ABC):
     @ticker.setter
     def ticker(self, symbol):
         self._ticker = symbol.upper()
-        self.stock_data = Ticker(symbol)
-        self.calculate_stats()
+        self._history = None
+        self._source = None
+        self._derived = None
+        self._info = None
+        self._stats = {}
 
     def requery_data(self, start: str, end: str) -> DataFrame:
-        return download(tickers=self.ticker, start=start.split(" ")[0], end=end.split(" ")[0])
+        return self.stock_data.history(self.ticker, start.split(" ")[0], end.split(" ")[0])
+
+    def to_arrow(self) -> 'pa.Table':
+        """
+        The stock's OHLCV data and dates as an Arrow table, for stocker.arrow.write_feather or to_ipc_stream.
+        """
+        from stocker.arrow import histories_to_table
+
+        return histories_to_table({self.ticker: self._load()}, {'start': self.start_date, 'end': self.end_date})
+
+    @classmethod
+    def from_arrow(cls, source: Union['pa.Table', str, bytes]) -> 'Stock':
+        """
+        Rebuilds a Stock exported by to_arrow, from the table, a Feather file's path or an IPC stream's bytes.
+        The history is a view of the Arrow data, so nothing is downloaded, parsed or copied.
+        """
+        from stocker.arrow import ArrowProvider, read_table
+
+        provider = ArrowProvider(read_table(source))
+        meta = provider.metadata
+        ticker = meta['tickers'][0]
+        return cls(ticker, meta['start'], meta['end'], history=provider.history(ticker, meta['start'], meta['end']), provider=provider)
+
+    def append_bars(self, bars: DataFrame):
+        """
+        Adds new OHLCV rows to the end of the history. Statistics that have already been calculated are updated
+        from the new rows alone rather than recalculated over the whole history. Rows dated on or before the
+        current last row replace the existing ones instead, and the statistics are then recalculated when next read.
+
+        Parameters:
+            bars (DataFrame): Date-indexed rows with Open, High, Low, Close and Volume columns.
+        """
+        if len(bars) == 0:
+            return
+        if not bars.index.is_monotonic_increasing:
+            bars = bars.sort_index()
+        frame = self._load()
+        self.end_date = max(self.end_date, (bars.index[-1] + timedelta(days=1)).strftime('%Y-%m-%d'))
+        if len(frame) and bars.index[0] <= frame.index[-1]:
+            merged = concat([frame, bars])
+            self.history = merged[~merged.index.duplicated(keep='last')].sort_index()
+            return
+
+        self._history = concat([frame, bars])
+        self._derived = None
+        # Every other memoized value is cheap to rebuild from these. The regression results of Market.betas are
+        # dropped too, as they no longer cover the whole history
+        stats = self._stats
+        self._stats = {}
+        if 'columns' in stats:
+            self._stats['columns'] = stats['columns'].merge(ColumnStats.from_block(self.stat_block(bars), self.stat_keys))
 
 
 class Market(ABC):
@@ -129,20 +314,33 @@ class Market(ABC):
         rf (str): A stock ticker whose performance is used as the "risk-free rate" for determining market performance.
         start (str): A date in yyyy-mm-dd format. This data is the beginning of a period of time to query stock data.
         end (str): A date in yyyy-mm-dd format. This data is the beginning of a period of time to query stock data.
+        provider (DataProvider): Where the stock data comes from. Defaults to get_default_provider().
     """
-    def __init__(self, symbols: List, rf: str='SPTI', start: str=str((datetime.now()-timedelta(days=365))), end: str=str(datetime.now())):
+    def __init__(self, symbols: List, rf: str='SPTI', start: str=str((datetime.now()-timedelta(days=365))), end: str=str(datetime.now()), provider: DataProvider=None):
         # Enforce capitalization
         self.tickers = [x.upper() for x in symbols]
-        self.stocks = []
-        for t in self.tickers:
-            self.stocks.append(Stock(t, start=start, end=end))
-
-        self.risk_free = Stock(rf, start=start, end=end)
-
-        # Retrieval the financial data
+        rf = rf.upper()
+        self.provider = provider if provider is not None else get_default_provider()
         self.start_date = start.split(" ")[0]
         self.end_date = end.split(" ")[0]
-        self.calculate_stats()
+        self._stats = {}
+
+        self._panel = self._initial_panel(list(dict.fromkeys(self.tickers + [rf])))
+        # One Stock per ticker, shared by repeated tickers and by the risk-free alternative if it is also listed
+        stocks = {}
+        for t in dict.fromkeys(self.tickers + [rf]):
+            stocks[t] = Stock(t, start=start, end=end, provider=self.provider)
+            if self._panel is not None:
+                # Each frame is only made when its Stock is first used, so building a Market over a memory-mapped
+                # store reads nothing, whatever the size of the universe
+                stocks[t]._source = partial(self._panel.frame, t)
+        self.stocks = [stocks[t] for t in self.tickers]
+        self.risk_free = stocks[rf]
+
+    def _initial_panel(self, tickers: List) -> Panel:
+        # One request for the whole basket, including the risk-free alternative. Every Stock's history is a view
+        # into the panel shared by the market
+        return self.provider.panel(tickers, self.start_date, self.end_date)
 
     def __str__(self):
         return "Market consisting of " + str(self.tickers) + " with a risk-free alternative based on '" + self.risk_free.ticker + "'"
@@ -150,17 +348,355 @@ class Market(ABC):
     def __repr__(self):
         return f"{self.__class__.__name__}({self.tickers!r}, rf={self.risk_free.ticker}, start={self.start_date!r}, end={self.end_date!r} )"
 
-    def calculate_stats(self):
-        open_stats = self.mkt_stats(self.stocks, 'open')
-        close_stats = self.mkt_stats(self.stocks, 'close')
-        high_stats = self.mkt_stats(self.stocks, 'high')
-        low_stats = self.mkt_stats(self.stocks, 'low')
-        self.average = {'open':open_stats[0], 'close':close_stats[0], 'high':high_stats[0], 'low':low_stats[0]}
-        self.variance = {'open':open_stats[1], 'close':close_stats[1], 'high':high_stats[1], 'low':low_stats[1]}
-        self.std_dev = {'open':open_stats[2], 'close':close_stats[2], 'high':high_stats[2], 'low':low_stats[2]}
-        self.raw_return_pct = open_stats[3]  # calculated 3 times more than necessary, but saves iterating through again
+    # The families of per-Stock statistics gathered into the market's stat matrix, and the keys reported for each
+    stat_families = ('average', 'variance', 'std_dev')
+    stat_keys = ('open', 'close', 'high', 'low')
+
+    def calculate_stats(self, processes: int=None):
+        """
+        Calculates the market-wide metrics as the column means of the stat matrix. This happens the first time
+        any of them is read.
+
+        Parameters:
+            processes (int): When given, the Stocks' statistics not yet calculated are calculated by this many
+                worker processes, which read the panel's prices from shared memory.
+        """
+        if processes:
+            pending = [s for s in self.stocks if 'columns' not in s._stats]
+            if pending:
+                results = parallel_column_stats(self.panel, [s.ticker for s in pending], Stock.stat_keys, processes)
+                for stock, (stats, return_pct) in zip(pending, results):
+                    stock._stats['columns'] = stats
+                    stock._stats.setdefault('return_pct', return_pct)
+                self._stats.pop('matrix', None)
+        matrix = self.stat_matrix()
+        self._stats['means'] = Series(matrix.to_numpy().mean(axis=0), index=matrix.columns)
+
+    @staticmethod
+    def _stat_row(stock: Stock) -> np.ndarray:
+        stats = stock.column_stats
+        return np.concatenate([stats.mean, stats.variance, stats.std_dev, [stock.return_pct]])
+
+    def stat_matrix(self, stocks: List=None) -> DataFrame:
+        """
+        Gathers the average, variance and std_dev of every column, and the return_pct, of each Stock into one
+        matrix with a row per Stock.
+
+        Parameters:
+            stocks (List): The Stocks to gather. Defaults to the market's, whose matrix is kept for reuse.
 
+        Returns:
+            DataFrame: A row per ticker, with (family, key) columns and a ('return_pct', '') column.
+        """
+        if stocks is None and 'matrix' in self._stats:
+            return self._stats['matrix']
+        rows = self.stocks if stocks is None else stocks
+        columns = MultiIndex.from_tuples([(f, k) for f in self.stat_families for k in Stock.stat_keys] + [('return_pct', '')])
+        block = np.empty((len(rows), len(columns)))
+        for i, stock in enumerate(rows):
+            block[i] = self._stat_row(stock)
+        matrix = DataFrame(block, index=[s.ticker for s in rows], columns=columns)
+        if stocks is None:
+            self._stats['matrix'] = matrix
+        return matrix
+
+    def _family(self, family: str) -> dict:
+        if 'means' not in self._stats:
+            self.calculate_stats()
+        means = self._stats['means']
+        return {k: means[(family, k)] for k in self.stat_keys}
+
+    @property
+    def average(self) -> dict:
+        return self._family('average')
+
+    @property
+    def variance(self) -> dict:
+        return self._family('variance')
+
+    @property
+    def std_dev(self) -> dict:
+        return self._family('std_dev')
+
+    @property
+    def raw_return_pct(self) -> float:
+        if 'means' in self._stats:
+            return self._stats['means'][('return_pct', '')]
+        if 'raw_return_pct' not in self._stats:
+            # Only needs each Stock's return, not its other metrics
+            self._stats['raw_return_pct'] = np.mean([s.return_pct for s in self.stocks])
+        return self._stats['raw_return_pct']
+
+    @property
+    def panel(self) -> Panel:
+        """
+        The OHLCV data of every Stock, including the risk-free one, as one array per field. After bars are
+        appended the panel is rebuilt on next use, and each Stock's history is pointed back into it.
+        """
+        if self._panel is None:
+            stocks = {s.ticker: s for s in self.stocks + [self.risk_free]}
+            self._panel = Panel.from_histories({t: s._load() for t, s in stocks.items()})
+            for s in stocks.values():
+                # Same data, so the memoized statistics stay valid
+                s._history = None
+                s._source = partial(self._panel.frame, s.ticker)
+        return self._panel
+
+    def closes(self) -> DataFrame:
+        """
+        The closing prices of every Stock, aligned on their dates with one column per ticker.
+        """
+        return self.panel.field('Close', [s.ticker for s in self.stocks])
+
+    def _panel_returns(self, kind: str) -> DataFrame:
+        key = ('panel_returns', kind)
+        if key not in self._stats:
+            self._stats[key] = price_returns(self.panel.field('Close'), kind)
+        return self._stats[key]
+
+    def returns(self, kind: str='simple') -> DataFrame:
+        """
+        The daily return series of every Stock, calculated together from the panel once per kind.
+
+        Parameters:
+            kind (str): 'simple', 'log' or 'cumulative', as for Stock.returns.
+
+        Returns:
+            DataFrame: A row per date and a column per ticker.
+        """
+        key = ('returns', kind)
+        if key not in self._stats:
+            self._stats[key] = self._panel_returns(kind)[list(dict.fromkeys(s.ticker for s in self.stocks))]
+        return self._stats[key]
+
+    @property
+    def risk_free_returns(self) -> Series:
+        """
+        The daily simple returns of the risk-free Stock on the market's dates.
+        """
+        return self._panel_returns('simple')[self.risk_free.ticker]
+
+    def excess_returns(self) -> DataFrame:
+        """
+        The daily simple returns of every Stock over those of the risk-free Stock, calculated once and shared by
+        every metric built on them.
+        """
+        if 'excess_returns' not in self._stats:
+            self._stats['excess_returns'] = self.returns().sub(self.risk_free_returns, axis=0)
+        return self._stats['excess_returns']
+
+    def stock(self, ticker: str) -> Stock:
+        """
+        Finds the market's Stock for a ticker, or None if it is not in the market.
+        """
+        ticker = ticker.upper()
+        for stock in self.stocks:
+            if stock.ticker == ticker:
+                return stock
+        return None
+
+    @property
+    def market_returns(self) -> Series:
+        """
+        The equal-weighted daily simple return of the market's Stocks.
+        """
+        if 'market_returns' not in self._stats:
+            self._stats['market_returns'] = self.returns().mean(axis=1)
+        return self._stats['market_returns']
+
+    @property
+    def market_excess_returns(self) -> Series:
+        """
+        The market's equal-weighted daily simple return over that of the risk-free Stock.
+        """
+        if 'market_excess_returns' not in self._stats:
+            self._stats['market_excess_returns'] = self.market_returns - self.risk_free_returns
+        return self._stats['market_excess_returns']
+
+    def performance(self, stocks: List=None, periods_per_year: int=252) -> DataFrame:
+        """
+        Calculates the Sharpe, Sortino and Treynor ratios, Jensen's alpha, information ratio, tracking error and
+        beta of Stocks against the market's equal-weighted return and the risk-free Stock, all in one pass over
+        their aligned daily returns. The memoized excess returns of the market, and of its own Stocks, are reused
+        for every call.
+
+        Parameters:
+            stocks (List): The Stocks to evaluate, which need not be in the market. Defaults to the market's own.
+            periods_per_year (int): Used to annualize the daily figures.
+
+        Returns:
+            DataFrame: A row per Stock and a column per metric.
+        """
+        if stocks is None and 'performance' in self._stats:
+            return self._stats['performance']
+        rows = self.stocks if stocks is None else stocks
+        excess = self.excess_returns()
+        block = np.empty((len(excess), len(rows)))
+        for j, stock in enumerate(rows):
+            if stock.ticker in excess.columns:
+                block[:, j] = excess[stock.ticker].to_numpy()
+            else:
+                block[:, j] = (stock.returns().reindex(excess.index) - self.risk_free_returns).to_numpy()
+        metrics = performance_metrics(block, self.market_excess_returns.to_numpy(), periods_per_year)
+        result = DataFrame(metrics, index=[s.ticker for s in rows])
+        if stocks is None:
+            self._stats['performance'] = result
+        return result
+
+    def rolling_stats(self, key: str='close', windows: List=(20, 60, 252), min_periods: int=None) -> DataFrame:
+        """
+        Stock.rolling_stats of one column for every Stock at once, calculated over the panel.
+
+        Parameters:
+            key (str): One of Stock.stat_keys.
+            windows (List): The window lengths, in trading days.
+            min_periods (int): The fewest values a window needs. Defaults to the whole window, so a Stock missing
+                a date the others have is NaN for the windows spanning it.
 
+        Returns:
+            DataFrame: A row per date and a (window, family, ticker) column for each statistic.
+        """
+        tickers = list(dict.fromkeys(s.ticker for s in self.stocks))
+        fields = {'open': 'Open', 'close': 'Close', 'high': 'High', 'low': 'Low'}
+        if key in fields:
+            block = self.panel.field(fields[key], tickers).to_numpy()
+        elif key == 'close-open':
+            block = self.panel.field('Close', tickers).to_numpy() - self.panel.field('Open', tickers).to_numpy()
+        elif key == 'high-low':
+            block = self.panel.field('High', tickers).to_numpy() - self.panel.field('Low', tickers).to_numpy()
+        else:
+            raise KeyError(f"{key!r} is not one of {Stock.stat_keys}")
+        return rolling_frame(block, self.panel.dates, tickers, windows, min_periods)
+
+    def _returns_between(self, start: str, end: str) -> DataFrame:
+        returns = self.returns()
+        lo = 0 if start is None else returns.index.searchsorted(Timestamp(start), side='left')
+        hi = len(returns) if end is None else returns.index.searchsorted(Timestamp(end), side='left')
+        return returns.iloc[lo:hi]
+
+    def covariance(self, start: str=None, end: str=None, shrinkage: bool=False, block_size: int=512) -> DataFrame:
+        """
+        The covariance matrix of the Stocks' daily returns, each pair over the dates where both have one.
+        Matrices are kept per date range, so asking again costs nothing.
+
+        Parameters:
+            start (str): A date in yyyy-mm-dd format. The first day of returns to use. Defaults to the first one.
+            end (str): A date in yyyy-mm-dd format. The day after the last day of returns to use. Defaults to all.
+            shrinkage (bool): Whether to apply Ledoit-Wolf shrinkage, for when there are many tickers and few dates.
+            block_size (int): The number of tickers handled at a time, bounding the memory used besides the matrix.
+        """
+        key = ('covariance', start, end, shrinkage)
+        if key not in self._stats:
+            returns = self._returns_between(start, end)
+            if shrinkage:
+                matrix, _ = ledoit_wolf(returns.to_numpy(), block_size)
+            else:
+                matrix = covariance_matrix(returns.to_numpy(), block_size)
+            self._stats[key] = DataFrame(matrix, index=returns.columns, columns=returns.columns, copy=False)
+        return self._stats[key]
+
+    def correlation(self, start: str=None, end: str=None, block_size: int=512) -> DataFrame:
+        """
+        The correlation matrix of the Stocks' daily returns, each pair over the dates where both have one.
+        Matrices are kept per date range, as for covariance.
+        """
+        key = ('correlation', start, end)
+        if key not in self._stats:
+            returns = self._returns_between(start, end)
+            matrix = correlation_matrix(returns.to_numpy(), block_size)
+            self._stats[key] = DataFrame(matrix, index=returns.columns, columns=returns.columns, copy=False)
+        return self._stats[key]
+
+    def betas(self, benchmark: str=None, lookback: int=None, frequency: str=None) -> DataFrame:
+        """
+        Calculates the alpha, beta and R² of every Stock against a benchmark in one vectorized regression of
+        their returns, and sets them on each Stock.
+
+        Parameters:
+            benchmark (str): A ticker to regress on. Defaults to the equal-weighted return of the market's Stocks.
+            lookback (int): Only use this many of the most recent returns. Defaults to all of them.
+            frequency (str): A pandas offset alias, such as 'W', to resample prices to before taking returns.
+                Defaults to daily returns.
+
+        Returns:
+            DataFrame: The alpha (per period), beta and r_squared of each ticker.
+        """
+        key = ('betas', benchmark, lookback, frequency)
+        if key not in self._stats:
+            if frequency is None:
+                returns = self._panel_returns('simple')
+            else:
+                returns = price_returns(self.panel.field('Close').resample(frequency).last())
+            if benchmark is not None:
+                benchmark = benchmark.upper()
+                if benchmark not in returns.columns:
+                    prices = Stock(benchmark, self.start_date, self.end_date, provider=self.provider)._load()['Close']
+                    if frequency is not None:
+                        prices = prices.resample(frequency).last()
+                    returns = returns.join(price_returns(prices).rename(benchmark), how='left')
+            if lookback is not None:
+                returns = returns.iloc[-lookback:]
+
+            tickers = [s.ticker for s in self.stocks]
+            block = returns[tickers].to_numpy(dtype=float)
+            if benchmark is None:
+                present = ~np.isnan(block)
+                with np.errstate(invalid='ignore'):
+                    market = np.where(present, block, 0.0).sum(axis=1) / present.sum(axis=1)
+            else:
+                market = returns[benchmark].to_numpy(dtype=float)
+            alpha, beta, r2 = market_model(block, market)
+            self._stats[key] = DataFrame({'alpha': alpha, 'beta': beta, 'r_squared': r2}, index=tickers)
+
+        result = self._stats[key]
+        for stock, (alpha, beta, r2) in zip(self.stocks, result.itertuples(index=False)):
+            stock.beta = beta
+            stock._stats['alpha'] = alpha
+            stock._stats['r_squared'] = r2
+        return result
+
+    def append_bars(self, bars: Dict[str, DataFrame]):
+        """
+        Adds new OHLCV rows to the end of several Stocks' histories. The market-wide metrics already calculated
+        are shifted by each updated Stock's change rather than recalculated over every Stock.
+
+        Parameters:
+            bars (Dict[str, DataFrame]): The new rows for each ticker, which may include the risk-free one.
+        """
+        positions = {}
+        for i, s in enumerate(self.stocks):
+            positions.setdefault(s.ticker, []).append(i)
+        matrix = self._stats.get('matrix')
+        n = len(self.stocks)
+        for ticker, frame in bars.items():
+            ticker = ticker.upper()
+            if ticker not in positions:
+                if ticker == self.risk_free.ticker:
+                    self.risk_free.append_bars(frame)
+                    continue
+                raise KeyError(f"{ticker!r} is not in the market")
+            # A ticker listed more than once is one Stock with a row in the matrix for each listing
+            rows = positions[ticker]
+            stock = self.stocks[rows[0]]
+            if matrix is not None:
+                before = matrix.iloc[rows[0]].to_numpy().copy()
+                stock.append_bars(frame)
+                after = self._stat_row(stock)
+                matrix.iloc[rows] = after
+                if 'means' in self._stats:
+                    self._stats['means'] += len(rows) * (after - before) / n
+                if 'raw_return_pct' in self._stats:
+                    # return_pct is the last column of the matrix
+                    self._stats['raw_return_pct'] += len(rows) * (after[-1] - before[-1]) / n
+            elif 'raw_return_pct' in self._stats:
+                before = stock.return_pct
+                stock.append_bars(frame)
+                self._stats['raw_return_pct'] += len(rows) * (stock.return_pct - before) / n
+            else:
+                stock.append_bars(frame)
+        self._panel = None
+        # Return series and regressions are recalculated from the new panel when next read
+        self._stats = {k: v for k, v in self._stats.items() if k in ('matrix', 'means', 'raw_return_pct')}
 
     def mkt_stats(self, stocks: List, col: str) -> List:
         """
@@ -171,20 +707,34 @@ class Market(ABC):
             col (str): The name of a column from the original dataframe which we are going to calculate.
 
         Returns:
-            something -- still a work in progress.
-        """
-        c = 0
-        avg = 0
-        vari = 0
-        stdv = 0
-        ret = 0
-        for stock in stocks:
-            c += 1
-            avg += stock.average[col]
-            vari += stock.variance[col]
-            stdv += stock.std_dev[col]
-            ret += stock.return_pct
-        return [avg/c, vari/c, stdv/c, ret/c]
+            List: The mean over the stocks of their average, variance and std_dev of the column, and of their return_pct.
+        """
+        matrix = self.stat_matrix(None if stocks is self.stocks else stocks)
+        means = matrix[[(f, col) for f in self.stat_families] + [('return_pct', '')]].to_numpy().mean(axis=0)
+        return list(means)
+
+    def to_arrow(self) -> 'pa.Table':
+        """
+        The OHLCV data of every Stock, including the risk-free one, as one Arrow table with a ticker's rows next
+        to each other. The schema also records the market's tickers, risk-free ticker and dates.
+        """
+        from stocker.arrow import histories_to_table
+
+        stocks = {s.ticker: s for s in self.stocks + [self.risk_free]}
+        metadata = {'symbols': self.tickers, 'rf': self.risk_free.ticker, 'start': self.start_date, 'end': self.end_date}
+        return histories_to_table({t: s._load() for t, s in stocks.items()}, metadata)
+
+    @classmethod
+    def from_arrow(cls, source: Union['pa.Table', str, bytes]) -> 'Market':
+        """
+        Rebuilds a Market exported by to_arrow, from the table, a Feather file's path or an IPC stream's bytes,
+        without downloading or parsing anything. The market's provider is then the Arrow data.
+        """
+        from stocker.arrow import ArrowProvider, read_table
+
+        provider = ArrowProvider(read_table(source))
+        meta = provider.metadata
+        return cls(meta['symbols'], rf=meta['rf'], start=meta['start'], end=meta['end'], provider=provider)
 
 
 class Pony(ABC):
@@ -193,21 +743,73 @@ class Pony(ABC):
 
     Attributes:
         symbol (str): A stock ticker symbol.
-        market (List): A list of the symbols that make up the market.
+        market (List): A list of the symbols that make up the market, or an already built Market to reuse, in which
+            case rf, start and end are taken from it.
         rf (str): A stock ticker whose performance is used as the "risk-free rate" for determining market performance.
         start (str): A date in yyyy-mm-dd format. This data is the beginning of a period of time to query stock data.
         end (str): A date in yyyy-mm-dd format. This data is the beginning of a period of time to query stock data.
+        provider (DataProvider): Where the stock data comes from. Defaults to get_default_provider().
     """
-    def __init__(self, ticker: str, market: List, rf: str='SPTI', start: str=str((datetime.now()-timedelta(days=365))), end: str=str(datetime.now())):
-        self.risk_free = rf
-        self.start_date = start.split(" ")[0]
-        self.end_date = end.split(" ")[0]
-        self.market = Market(market, rf, start, end)
-        self.stock = Stock(ticker, start, end)
+    def __init__(self, ticker: str, market: Union[List, Market], rf: str='SPTI', start: str=str((datetime.now()-timedelta(days=365))), end: str=str(datetime.now()), provider: DataProvider=None):
+        if not isinstance(market, Market):
+            market = Market(market, rf, start, end, provider=provider)
+        self.market = market
+        self.risk_free = market.risk_free.ticker
+        self.start_date = market.start_date
+        self.end_date = market.end_date
+        self.stock = self.market.stock(ticker)
+        if self.stock is None:
+            self.stock = Stock(ticker, self.start_date, self.end_date, provider=self.market.provider)
+        self._metrics = None
+
+    @classmethod
+    def batch(cls, tickers: List, market: Union[List, Market], rf: str='SPTI', start: str=str((datetime.now()-timedelta(days=365))), end: str=str(datetime.now()), provider: DataProvider=None, workers: int=4) -> DataFrame:
+        """
+        Scores many candidate stocks against one market, which is built once (or reused if a Market is given).
+        Candidates outside the market are fetched with a single request, and they are evaluated in shards
+        on a pool of threads.
 
+        Parameters:
+            tickers (List): The candidate stock ticker symbols.
+            market (List): As for Pony.
+            workers (int): The number of threads evaluating shards of candidates, at least 1.
+
+        Returns:
+            DataFrame: A row per candidate and a column per metric of Pony.metrics.
+        """
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, not {workers!r}")
+        if not isinstance(market, Market):
+            market = Market(market, rf, start, end, provider=provider)
+        tickers = list(dict.fromkeys(t.upper().split(" ")[0] for t in tickers))
+        # The risk-free Stock is already loaded too
+        members = {s.ticker: s for s in market.stocks + [market.risk_free]}
+        outside = [t for t in tickers if t not in members]
+        histories = market.provider.histories(outside, market.start_date, market.end_date) if outside else {}
+        stocks = [members[t] if t in members else Stock(t, market.start_date, market.end_date, history=histories[t], provider=market.provider) for t in tickers]
+        if not stocks:
+            return market.performance([])
+
+        # Fill the market's shared series before the threads read them
+        market.excess_returns()
+        market.market_excess_returns
+        size = -(-len(stocks) // workers)
+        shards = [stocks[i:i + size] for i in range(0, len(stocks), size)]
+        with ThreadPoolExecutor(workers) as pool:
+            return concat(pool.map(market.performance, shards))
 
     def __str__(self):
         return "Stock '" + self.stock.ticker + "' performing in a " + str(self.market)
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.stock.ticker!r}, rf={self.risk_free}, start={self.start_date!r}, end={self.end_date!r} )"
+
+    @property
+    def metrics(self) -> dict:
+        """
+        The stock's Sharpe, Sortino and Treynor ratios, Jensen's alpha, information ratio, tracking error and beta
+        against the market, as calculated by Market.performance.
+        """
+        if self._metrics is None:
+            self._metrics = self.market.performance([self.stock]).iloc[0].to_dict()
+        return self._metrics
@@ -0,0 +1,101 @@
+import json
+import os
+from typing import List
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex
+
+from stocker.panel import Panel
+from stocker.providers import DataProvider
+
+
+class MemmapStore(DataProvider):
+    """
+    A provider over a directory of memory-mapped arrays, for opening a large universe instantly. Each field is a
+    raw file of float64 values laid out as the column-major (dates, tickers) array of a Panel, so every ticker's
+    series is one contiguous run of the file. Beside them are the dates, each ticker's [first, last + 1) rows and
+    a small JSON index naming the tickers and fields.
+
+    Opening a store only maps the files, so it takes the same time whatever the number of tickers, and the
+    histories handed to Stocks and Markets are views of the mapped pages, which the OS reads in when first used.
+
+    Attributes:
+        directory (str): The directory holding the files.
+        panel_data (Panel): The whole store, whose arrays are read-only memory maps.
+    """
+    version = 1
+    dtype = np.float64
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, 'index.json')) as f:
+            index = json.load(f)
+        if index['version'] != self.version:
+            raise ValueError(f"{directory!r} holds a version {index['version']} store, not version {self.version}")
+        dates = DatetimeIndex(np.load(os.path.join(directory, 'dates.npy')), name='Date')
+        bounds = np.load(os.path.join(directory, 'bounds.npy'), mmap_mode='r')
+        shape = (len(dates), len(index['tickers']))
+        values = {}
+        for field in index['fields']:
+            if shape[0] and shape[1]:
+                values[field] = np.memmap(self._field_path(directory, field), dtype=self.dtype, mode='r', shape=shape, order='F')
+            else:
+                # An empty file cannot be mapped
+                values[field] = np.empty(shape, dtype=self.dtype, order='F')
+        self.panel_data = Panel(dates, index['tickers'], values, bounds)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.directory!r})"
+
+    @staticmethod
+    def _field_path(directory: str, field: str) -> str:
+        return os.path.join(directory, field + '.f64')
+
+    @classmethod
+    def write(cls, panel: Panel, directory: str) -> 'MemmapStore':
+        """
+        Writes a panel, such as Market.panel, to a directory as a store, and opens it. The index is written last,
+        so a store whose writing was interrupted cannot be opened.
+
+        Parameters:
+            panel (Panel): The data to store.
+            directory (str): Where to write the files. Any store already there is replaced.
+        """
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, 'index.json')
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        for field in panel.fields:
+            # Column-major, so each ticker's series is written out contiguously
+            np.asfortranarray(panel.values[field], dtype=cls.dtype).T.tofile(cls._field_path(directory, field))
+        np.save(os.path.join(directory, 'dates.npy'), panel.dates.to_numpy(dtype='datetime64[ns]'))
+        np.save(os.path.join(directory, 'bounds.npy'), np.asarray(panel.bounds, dtype=np.int64))
+        with open(index_path + '.tmp', 'w') as f:
+            json.dump({'version': cls.version, 'tickers': panel.tickers, 'fields': panel.fields}, f)
+        os.replace(index_path + '.tmp', index_path)
+        return cls(directory)
+
+    @property
+    def tickers(self) -> List:
+        return self.panel_data.tickers
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.panel_data
+
+    def _check(self, symbols: List):
+        for symbol in symbols:
+            if symbol not in self.panel_data:
+                raise KeyError(f"No data for {symbol!r} in {self.directory!r}")
+
+    def history(self, symbol: str, start: str, end: str) -> DataFrame:
+        self._check([symbol])
+        return self.panel_data.subset([symbol], start, end).frame(symbol)
+
+    def panel(self, symbols: List, start: str, end: str) -> Panel:
+        """
+        The stored data of several stocks as a Panel. When the symbols are stored next to each other, as they
+        are for a whole store, its arrays are views of the memory maps; otherwise only their columns are read.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        self._check(symbols)
+        return self.panel_data.subset(symbols, start, end)
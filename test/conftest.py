@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocker.providers import DataProvider, LocalProvider
+
+
+def make_history(start='2020-01-01', end='2020-02-01', offset=10):
+    dates = pd.date_range(start, end, freq='B', name='Date')
+    base = np.arange(len(dates), dtype=float) + offset
+    return pd.DataFrame({'Open': base, 'High': base + 2, 'Low': base - 1,
+                         'Close': base + 1, 'Volume': base * 100}, index=dates)
+
+
+def make_histories(tickers, start='2020-01-01', end='2020-03-01'):
+    return {t: make_history(start, end, offset=10 * (i + 1)) for i, t in enumerate(tickers)}
+
+
+class FakeDownloader:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tickers, start, end, group_by='column'):
+        self.calls.append(list(tickers))
+        return pd.concat({t: make_history(start, end, 10 * (i + 1)) for i, t in enumerate(tickers)}, axis=1)
+
+
+class RecordingProvider(DataProvider):
+    def __init__(self):
+        self.calls = []
+        self.data = make_history('2019-01-01', '2021-01-01')
+
+    def history(self, symbol, start, end):
+        self.calls.append((symbol, start, end))
+        return self.data[(self.data.index >= start) & (self.data.index < end)]
+
+
+@pytest.fixture
+def local_histories(request):
+    """
+    The histories written by the local fixture. Parametrize indirectly with a list of tickers, or override in a
+    test module, to write others.
+    """
+    return make_histories(getattr(request, 'param', ['MSFT', 'TSLA', 'SPTI']))
+
+
+@pytest.fixture
+def local(tmp_path, local_histories):
+    for ticker, history in local_histories.items():
+        history.to_csv(tmp_path / f'{ticker}.csv')
+    return LocalProvider(str(tmp_path))
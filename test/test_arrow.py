@@ -0,0 +1,55 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import make_histories
+from stocker.arrow import *
+from stocker.stocker import Market, Stock
+
+
+@pytest.fixture
+def local_histories():
+    histories = make_histories(['A', 'B', 'SPTI'])
+    histories['B'] = histories['B'].loc['2020-01-15':]
+    return histories
+
+
+def test_stock_round_trip(local, tmp_path):
+    stock = Stock('a', start='2020-01-01', end='2020-02-01', provider=local)
+    path = str(tmp_path / 'a.feather')
+    write_feather(stock.to_arrow(), path)
+    restored = Stock.from_arrow(path)
+    assert restored.ticker == 'A' and restored.end_date == '2020-02-01'
+    assert restored._load().equals(stock._load())
+    assert restored.average == pytest.approx(stock.average)
+    # The history's columns point into the memory-mapped file
+    table = restored.stock_data.table
+    assert np.shares_memory(restored._load()['Close'].to_numpy(), table.column('Close').chunk(0).to_numpy())
+
+
+def test_market_round_trip(local, tmp_path):
+    market = Market(['a', 'b'], start='2020-01-01', end='2020-03-01', provider=local)
+    table = market.to_arrow()
+    assert table.column_names == ['Ticker', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+    # B's gap before its first date is not exported
+    assert table.num_rows == sum(len(s._load().dropna(how='all')) for s in market.stocks + [market.risk_free])
+
+    for source in [table, to_ipc_stream(table).to_pybytes()]:
+        restored = Market.from_arrow(source)
+        assert restored.tickers == ['A', 'B'] and restored.risk_free.ticker == 'SPTI'
+        assert restored.panel.dates.equals(market.panel.dates)
+        np.testing.assert_array_equal(restored.panel.values['Close'], market.panel.values['Close'])
+        assert restored.average == pytest.approx(market.average)
+
+    provider = ArrowProvider(table)
+    frame = provider.history('B', '2020-02-01', '2020-02-15')
+    assert frame.index[0] == np.datetime64('2020-02-03') and frame.index[-1] == np.datetime64('2020-02-14')
+    with pytest.raises(KeyError):
+        provider.history('ZZZ', '2020-01-01', '2020-02-01')
+
+
+def test_stocker_does_not_import_arrow():
+    code = 'import sys, stocker.stocker; assert "stocker.arrow" not in sys.modules'
+    subprocess.run([sys.executable, '-c', code], check=True)
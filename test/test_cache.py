@@ -0,0 +1,119 @@
+from datetime import datetime
+
+import pytest
+from pandas import Timestamp
+
+from conftest import RecordingProvider
+from stocker.cache import *
+from stocker.stocker import Stock
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def upstream():
+    return RecordingProvider()
+
+
+def test_missing_intervals():
+    covered = [['2020-01-01', '2020-02-01'], ['2020-03-01', '2020-04-01']]
+    assert missing_intervals(covered, '2019-12-01', '2020-05-01') == [
+        ('2019-12-01', '2020-01-01'), ('2020-02-01', '2020-03-01'), ('2020-04-01', '2020-05-01')]
+    assert missing_intervals(covered, '2020-01-10', '2020-01-20') == []
+
+
+def test_fetch_missing(upstream):
+    coverage = {'A': [['2020-01-01', '2020-02-01']], 'B': [], 'C': []}
+    fetched, covered = fetch_missing(upstream, coverage, '2020-01-01', '2020-03-01', '2020-02-15')
+    assert sorted(upstream.calls) == [('A', '2020-02-01', '2020-03-01'), ('B', '2020-01-01', '2020-03-01'),
+                                      ('C', '2020-01-01', '2020-03-01')]
+    assert covered == {'A': [['2020-02-01', '2020-02-15']], 'B': [['2020-01-01', '2020-02-15']],
+                       'C': [['2020-01-01', '2020-02-15']]}
+    assert fetched['A'][0].index[0] == Timestamp('2020-02-03')
+
+
+def test_second_request_is_served_from_disk(tmp_path, upstream):
+    cache = ParquetCache(upstream, str(tmp_path))
+    first = cache.history('MSFT', '2020-01-01', '2020-02-01')
+    second = ParquetCache(upstream, str(tmp_path)).history('MSFT', '2020-01-01', '2020-02-01')
+    assert len(upstream.calls) == 1
+    assert second.equals(first)
+
+
+def test_only_missing_dates_are_fetched(tmp_path, upstream):
+    cache = ParquetCache(upstream, str(tmp_path))
+    cache.history('MSFT', '2020-01-01', '2020-02-01')
+    result = cache.history('MSFT', '2019-12-01', '2020-03-01')
+    assert upstream.calls[1:] == [('MSFT', '2019-12-01', '2020-01-01'), ('MSFT', '2020-02-01', '2020-03-01')]
+    assert result.index.is_monotonic_increasing and result.index.is_unique
+    assert result['Open'].equals(upstream.history('MSFT', '2019-12-01', '2020-03-01')['Open'])
+
+
+def test_todays_bar_is_refetched(tmp_path, upstream):
+    cache = ParquetCache(upstream, str(tmp_path), clock=lambda: datetime(2020, 1, 15))
+    cache.history('MSFT', '2020-01-01', '2020-01-16')
+    cache.history('MSFT', '2020-01-01', '2020-01-16')
+    assert upstream.calls[1:] == [('MSFT', '2020-01-15', '2020-01-16')]
+
+
+def test_missing_symbol_on_a_cold_cache(tmp_path, upstream):
+    cache = ParquetCache(upstream, str(tmp_path))
+    with pytest.raises(KeyError, match='MSFT'):
+        cache.history('MSFT', '2020-02-01', '2020-02-01')
+
+
+def test_invalidate(tmp_path, upstream):
+    cache = ParquetCache(upstream, str(tmp_path))
+    cache.history('MSFT', '2020-01-01', '2020-02-01')
+    cache.invalidate('MSFT')
+    cache.history('MSFT', '2020-01-01', '2020-02-01')
+    assert len(upstream.calls) == 2
+
+
+def test_memory_cache_hits(upstream):
+    cache = MemoryCache(upstream)
+    first = cache.history('MSFT', '2020-01-01', '2020-02-01')
+    assert cache.history('MSFT', '2020-01-01', '2020-02-01').equals(first)
+    cache.histories(['MSFT', 'TSLA'], '2020-01-01', '2020-02-01')
+    assert upstream.calls == [('MSFT', '2020-01-01', '2020-02-01'), ('TSLA', '2020-01-01', '2020-02-01')]
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_memory_cache_evicts_least_recently_used(upstream):
+    size = int(upstream.history('A', '2020-01-01', '2020-02-01').memory_usage(index=True, deep=True).sum())
+    cache = MemoryCache(upstream, max_bytes=2 * size)
+    cache.history('A', '2020-01-01', '2020-02-01')
+    cache.history('B', '2020-01-01', '2020-02-01')
+    cache.history('A', '2020-01-01', '2020-02-01')
+    cache.history('C', '2020-01-01', '2020-02-01')
+    assert len(cache) == 2 and cache.nbytes == 2 * size
+    assert cache.get('B', '2020-01-01', '2020-02-01') is None
+    assert cache.get('A', '2020-01-01', '2020-02-01') is not None
+
+
+def test_memory_cache_skips_oversized_frames(upstream):
+    cache = MemoryCache(upstream, max_bytes=1)
+    cache.history('A', '2020-01-01', '2020-02-01')
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_memory_cache_results_can_be_modified(upstream):
+    cache = MemoryCache(upstream)
+    frame = Stock('msft', start='2020-01-01', end='2020-02-01', provider=cache).requery_data('2020-01-01', '2020-02-01')
+    rows = len(frame)
+    frame['Signal'] = 1
+    frame.drop(frame.index[:5], inplace=True)
+    frame.iloc[0, 0] = -1.0
+    again = Stock('msft', start='2020-01-01', end='2020-02-01', provider=cache)
+    assert len(again.history) == rows and 'Signal' not in again.history.columns
+    assert again.history['Open'].min() > 0
+    assert len(upstream.calls) == 1
+
+
+def test_memory_cache_skips_missing_symbols(upstream):
+    class PartialProvider(RecordingProvider):
+        def histories(self, symbols, start, end):
+            return {s: self.history(s, start, end) for s in symbols if s != 'GONE'}
+
+    cache = MemoryCache(PartialProvider())
+    assert list(cache.histories(['A', 'GONE'], '2020-01-01', '2020-02-01')) == ['A']
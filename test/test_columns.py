@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from conftest import make_history
+from stocker.columns import *
+from stocker.stocker import Stock
+
+
+@pytest.fixture
+def stock(local):
+    return Stock('msft', start='2020-01-01', end='2020-02-01', provider=local)
+
+
+def test_eager_columns_are_materialized_once(stock):
+    history = stock.history
+    assert stock.history is history
+    assert (history['Close-Open'] == 1).all() and (history['High-Low'] == 3).all()
+
+
+def test_shared_frame_is_not_modified(stock):
+    raw = stock._load()
+    stock.history
+    assert 'Close-Open' not in raw.columns
+
+
+def test_history_setter_invalidates(stock):
+    history = stock.history
+    stock.history = make_history(offset=50)
+    assert stock.history is not history
+    assert stock.history['Open'].iloc[0] == 50
+
+
+def test_lazy_columns(stock):
+    assert 'Log Return' not in stock.history.columns
+    log_return = stock.column('Log Return')
+    assert np.isnan(log_return.iloc[0])
+    assert log_return.iloc[1] == pytest.approx(np.log(12 / 11))
+    assert 'Log Return' in stock.history.columns
+    true_range = stock.column('True Range')
+    assert true_range.iloc[0] == 3 and true_range.iloc[1] == 3
+
+
+def test_register_column(stock):
+    register_column('Typical', lambda frame: (frame['High'] + frame['Low'] + frame['Close']) / 3)
+    try:
+        assert stock.column('Typical').iloc[0] == pytest.approx((12 + 9 + 11) / 3)
+    finally:
+        del derived_columns['Typical']
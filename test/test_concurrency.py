@@ -0,0 +1,115 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from threading import Barrier, Event
+
+import pytest
+
+from conftest import make_history
+from stocker.concurrency import *
+from stocker.providers import DataProvider
+from stocker.stocker import Market
+
+
+class BlockingProvider(DataProvider):
+    """
+    Calls wait before answering each request, so tests can hold requests until others have started.
+    """
+    def __init__(self, wait=lambda: None):
+        self.wait = wait
+        self.calls = []
+
+    def history(self, symbol, start, end):
+        return self.histories([symbol], start, end)[symbol]
+
+    def histories(self, symbols, start, end):
+        self.wait()
+        self.calls.extend(symbols)
+        return {s: make_history(start, end) for s in dict.fromkeys(symbols)}
+
+    def info(self, symbol):
+        return {'beta': 1.0}
+
+
+class GatedFlight(SingleFlight):
+    """
+    Holds every request once it has joined or started its flights until the barrier's other parties have too.
+    """
+    def __init__(self, provider, barrier):
+        super().__init__(provider)
+        self.barrier = barrier
+
+    def _join(self, keys):
+        joined = super()._join(keys)
+        self.barrier.wait()
+        return joined
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=50, burst=2)
+    begin = time.monotonic()
+    for _ in range(7):
+        limiter.acquire()
+    assert time.monotonic() - begin >= 5 / 50 * 0.9
+
+
+def test_threaded_provider_batches_in_parallel():
+    # Every batch must be in flight at once for the barrier to let any through
+    barrier = Barrier(8, timeout=5)
+    blocking = BlockingProvider(barrier.wait)
+    with ThreadedProvider(blocking, workers=8, batch_size=1) as provider:
+        assert provider._pool is None
+        histories = provider.histories([f'T{i}' for i in range(8)], '2020-01-01', '2020-02-01')
+    assert sorted(histories) == sorted(blocking.calls)
+    # The threads are stopped on leaving the block
+    assert provider._pool is None
+
+
+def test_threaded_provider_timeout():
+    release = Event()
+    provider = ThreadedProvider(BlockingProvider(lambda: release.wait(5)), timeout=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            provider.history('A', '2020-01-01', '2020-02-01')
+    finally:
+        release.set()
+
+
+def test_concurrent_market_construction():
+    # The 13 history requests are made in 4 batches, which must all be in flight at once
+    barrier = Barrier(4, timeout=5)
+    provider = ThreadedProvider(BlockingProvider(barrier.wait), workers=16, batch_size=4, limiter=RateLimiter(1000, burst=16))
+    market = Market([f't{i}' for i in range(12)], start='2020-01-01', end='2020-02-01', provider=provider)
+    assert [s.ticker for s in market.stocks] == [f'T{i}' for i in range(12)]
+    assert market.stocks[0].info == {'beta': 1.0}
+
+
+def test_single_flight_shares_one_fetch():
+    requests = [['SPTI'], ['SPTI', 'MSFT'], ['SPTI', 'TSLA'], ['SPTI']] * 2
+    blocking = BlockingProvider()
+    # No fetch starts until every request has joined the flights underway
+    provider = GatedFlight(blocking, Barrier(len(requests), timeout=5))
+    with ThreadPoolExecutor(len(requests)) as pool:
+        results = list(pool.map(lambda symbols: provider.histories(symbols, '2020-01-01', '2020-02-01'), requests))
+    assert sorted(blocking.calls) == ['MSFT', 'SPTI', 'TSLA']
+    assert provider.fetches == 3 and provider.coalesced == 9
+    assert all(r['SPTI'] is results[0]['SPTI'] for r in results)
+    # Nothing is kept once the fetch has landed
+    provider.barrier = Barrier(1)
+    provider.history('SPTI', '2020-01-01', '2020-02-01')
+    assert blocking.calls.count('SPTI') == 2
+
+
+def test_single_flight_shares_errors():
+    class FailingProvider(BlockingProvider):
+        def histories(self, symbols, start, end):
+            self.calls.extend(symbols)
+            raise ConnectionError(symbols[0])
+
+    failing = FailingProvider()
+    provider = GatedFlight(failing, Barrier(4, timeout=5))
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(provider.history, 'SPTI', '2020-01-01', '2020-02-01') for _ in range(4)]
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result()
+    assert failing.calls == ['SPTI'] and provider.coalesced == 3
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocker.covariance import *
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(3)
+    common = rng.normal(0, 0.01, (300, 1))
+    data = common + rng.normal(0, 0.01, (300, 7))
+    data[rng.random(data.shape) < 0.1] = np.nan
+    data[:, 6] = np.nan
+    data[:3, 6] = 0.01
+    return data
+
+
+def test_covariance_matches_pandas(returns):
+    expected = pd.DataFrame(returns).cov().to_numpy()
+    np.testing.assert_allclose(covariance_matrix(returns, block_size=3), expected, rtol=1e-10, atol=1e-16)
+
+
+def test_correlation_matches_pandas(returns):
+    expected = pd.DataFrame(returns).corr().to_numpy()
+    result = correlation_matrix(returns[:, :6], block_size=4)
+    np.testing.assert_allclose(result, expected[:6, :6], rtol=1e-10)
+    assert np.allclose(np.diag(result), 1)
+
+
+def test_min_periods(returns):
+    result = covariance_matrix(returns, min_periods=5)
+    assert np.isnan(result[6]).all() and np.isnan(result[:, 6]).all()
+
+
+def test_ledoit_wolf_matches_scikit_learn(returns):
+    sklearn = pytest.importorskip('sklearn.covariance')
+    complete = returns[:, :6]
+    complete = np.where(np.isnan(complete), 0.0, complete)
+    complete = complete - complete.mean(axis=0)
+    expected, expected_shrinkage = sklearn.ledoit_wolf(complete)
+    result, shrinkage = ledoit_wolf(complete, block_size=4)
+    np.testing.assert_allclose(result, expected, rtol=1e-10)
+    assert shrinkage == pytest.approx(expected_shrinkage)
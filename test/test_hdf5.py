@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip('h5py')
+
+from conftest import make_history
+from stocker.hdf5 import *
+from stocker.stocker import Market, Stock
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = HDF5Archive(str(tmp_path / 'archive.h5'), chunk_rows=16)
+    archive.write({t: make_history('2015-01-01', '2020-01-01', offset=10 * (i + 1)) for i, t in enumerate(['MSFT', 'TSLA', 'SPTI'])})
+    return archive
+
+
+def test_datasets_are_chunked_and_compressed(archive):
+    with h5py.File(archive.path, 'r') as f:
+        values = f['tickers/MSFT/values']
+        assert values.chunks == (16, 5) and values.compression == 'lzf'
+        assert len(f['tickers/MSFT/chunk_starts']) == -(-len(values) // 16)
+    assert archive.tickers == ['MSFT', 'SPTI', 'TSLA']
+
+
+@pytest.mark.parametrize('start, end', [('2017-03-01', '2018-03-01'), ('2010-01-01', '2015-01-20'), ('2019-12-25', '2030-01-01'), ('2021-01-01', '2022-01-01')])
+def test_date_slices(archive, start, end):
+    expected = make_history('2015-01-01', '2020-01-01', 10)
+    expected = expected[(expected.index >= start) & (expected.index < end)]
+    frame = archive.history('MSFT', start, end)
+    assert frame.index.equals(expected.index)
+    np.testing.assert_array_equal(frame.to_numpy(), expected.to_numpy())
+
+
+def test_appends_and_merges(archive):
+    full = make_history('2015-01-01', '2020-06-01', 10)
+    archive.write({'MSFT': full.loc['2020-01-02':]})
+    frame = archive.history('MSFT', '2019-12-01', '2020-07-01')
+    np.testing.assert_array_equal(frame.to_numpy(), full.loc['2019-12-01':].to_numpy())
+    assert archive.history('MSFT', '2020-05-01', '2020-05-08').index.equals(full.loc['2020-05-01':'2020-05-07'].index)
+
+    revised = full.loc['2018-01-01':'2018-01-31'] * 2
+    archive.write({'MSFT': revised})
+    np.testing.assert_array_equal(archive.history('MSFT', '2018-01-01', '2018-02-01').to_numpy(), revised.to_numpy())
+    assert len(archive.history('MSFT', '2000-01-01', '2030-01-01')) == len(full)
+
+
+def test_stock_and_market_read_the_archive(archive):
+    stock = Stock('msft', start='2019-01-01', end='2019-07-01', provider=archive)
+    assert stock.history.index[0] == np.datetime64('2019-01-01')
+    market = Market(['msft', 'tsla'], start='2019-01-01', end='2019-07-01', provider=archive)
+    assert market.stocks[1]._load().index[-1] == np.datetime64('2019-06-28')
+    with pytest.raises(KeyError):
+        archive.history('NONE', '2019-01-01', '2019-07-01')
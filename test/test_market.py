@@ -0,0 +1,302 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import stocker.providers as providers
+from stocker.providers import LocalProvider, YahooProvider
+from conftest import FakeDownloader
+from stocker.stocker import *
+
+
+class FakeTicker:
+    def __init__(self, symbol):
+        self.info = {'beta': 1.0}
+
+
+@pytest.fixture(autouse=True)
+def offline_ticker(monkeypatch):
+    monkeypatch.setattr(providers, 'Ticker', FakeTicker)
+
+
+def test_market_uses_one_download():
+    fake = FakeDownloader()
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=YahooProvider(fake))
+    assert fake.calls == [['MSFT', 'TSLA', 'SPTI']]
+    assert [s.ticker for s in market.stocks] == ['MSFT', 'TSLA']
+    assert market.risk_free.ticker == 'SPTI'
+    assert market.stocks[0].history['Open'].iloc[0] == 10
+    assert market.stocks[0].beta is None
+
+
+def test_market_from_local_provider(local):
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=local)
+    assert market.stocks[1].history['Open'].iloc[0] == 20
+    assert market.stocks[0].beta is None
+    assert market.average['open'] == pytest.approx((market.stocks[0].average['open'] + market.stocks[1].average['open']) / 2)
+
+
+def test_stock_requery_uses_provider(local):
+    stock = Stock('msft', start='2020-01-01', end='2020-02-01', provider=local)
+    assert stock.stock_data is local
+    assert len(stock.requery_data('2020-01-06', '2020-01-08')) == 2
+
+
+def test_pony_shares_provider(local):
+    pony = Pony('tsla', ['msft'], start='2020-01-01', end='2020-02-01', provider=local)
+    assert pony.stock.stock_data is local
+    assert pony.market.provider is local
+
+
+def test_pony_reuses_market_downloads(local):
+    from stocker.cache import MemoryCache
+    cache = MemoryCache(local)
+    Pony('msft', ['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=cache)
+    assert cache.misses == 3
+    Pony('tsla', ['msft'], start='2020-01-01', end='2020-02-01', provider=cache)
+    assert cache.misses == 3
+
+
+class CountingProvider(LocalProvider):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.calls = []
+
+    def history(self, symbol, start, end):
+        self.calls.append(('history', symbol))
+        return super().history(symbol, start, end)
+
+    def info(self, symbol):
+        self.calls.append(('info', symbol))
+        return {'beta': 1.5}
+
+
+def test_stock_loads_lazily(local):
+    counting = CountingProvider(local.directory)
+    stock = Stock('msft', start='2020-01-01', end='2020-02-01', provider=counting)
+    assert counting.calls == []
+    stock.return_pct
+    assert counting.calls == [('history', 'MSFT')]
+    assert stock.average is stock.average
+    # Beta is only ever calculated, never read from the provider's metadata
+    assert stock.beta is None
+    assert counting.calls == [('history', 'MSFT')]
+
+
+def test_stock_history_setter_resets_stats(local):
+    stock = Stock('msft', start='2020-01-01', end='2020-02-01', provider=local)
+    before = stock.average['open']
+    stock.history = stock.requery_data('2020-01-01', '2020-01-10')
+    assert stock.average['open'] < before
+
+
+def test_market_return_does_not_need_other_stats(local):
+    counting = CountingProvider(local.directory)
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=counting)
+    assert market.raw_return_pct == pytest.approx((market.stocks[0].return_pct + market.stocks[1].return_pct) / 2)
+    assert all(s._stats.keys() == {'return_pct'} for s in market.stocks)
+    assert ('info', 'MSFT') not in counting.calls
+
+
+def test_stock_stats_match_pandas(local):
+    stock = Stock('msft', start='2020-01-01', end='2020-02-01', provider=local)
+    history = stock.history
+    for family, method in [('average', 'mean'), ('variance', 'var'), ('std_dev', 'std'), ('max', 'max'), ('min', 'min')]:
+        assert getattr(stock, family)['close-open'] == pytest.approx(getattr(history['Close-Open'], method)())
+        assert getattr(stock, family)['low'] == pytest.approx(getattr(history['Low'], method)())
+
+
+def test_stock_append_bars_updates_stats(local):
+    full = Stock('msft', start='2020-01-01', end='2020-03-01', provider=local)
+    stock = Stock('msft', start='2020-01-01', end='2020-02-01', provider=local)
+    stock.calculate_stats()
+    stock.append_bars(full.requery_data('2020-02-01', '2020-03-01'))
+    assert stock.end_date == '2020-02-29'
+    assert len(stock.history) == len(full.history)
+    assert stock.return_pct == pytest.approx(full.return_pct)
+    for family in Stock.stat_families:
+        for key in Stock.stat_keys:
+            assert getattr(stock, family)[key] == pytest.approx(getattr(full, family)[key])
+
+
+def test_stock_append_overlapping_bars_replaces_rows(local):
+    stock = Stock('msft', start='2020-01-01', end='2020-02-01', provider=local)
+    stock.average
+    bars = stock.requery_data('2020-01-31', '2020-02-01') + 100
+    stock.append_bars(bars)
+    assert stock.history['Open'].iloc[-1] == bars['Open'].iloc[0]
+    assert stock.history.index.is_unique
+    assert stock.max['open'] == bars['Open'].iloc[0]
+
+
+def test_market_append_bars_updates_aggregates(local):
+    full = Market(['msft', 'tsla'], start='2020-01-01', end='2020-03-01', provider=local)
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=local)
+    market.calculate_stats()
+    market.append_bars({t: local.history(t, '2020-02-01', '2020-03-01') for t in ['MSFT', 'TSLA', 'SPTI']})
+    assert market.raw_return_pct == pytest.approx(full.raw_return_pct)
+    for family in ['average', 'variance', 'std_dev']:
+        for col in ['open', 'close', 'high', 'low']:
+            assert getattr(market, family)[col] == pytest.approx(getattr(full, family)[col])
+    assert len(market.risk_free.history) == len(full.risk_free.history)
+
+
+def test_market_append_bars_after_stat_matrix(local):
+    full = Market(['msft', 'tsla'], start='2020-01-01', end='2020-03-01', provider=local)
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=local)
+    market.stat_matrix()
+    market.raw_return_pct
+    market.append_bars({t: local.history(t, '2020-02-01', '2020-03-01') for t in ['MSFT', 'TSLA']})
+    assert market.raw_return_pct == pytest.approx(full.raw_return_pct)
+    assert market.average == pytest.approx(full.average)
+
+
+@pytest.fixture
+def geared(tmp_path):
+    rng = np.random.default_rng(2)
+    dates = pd.date_range('2020-01-01', '2020-12-31', freq='B', name='Date')
+    index_returns = rng.normal(0, 0.01, len(dates))
+    for ticker, gearing in [('IDX', 1.0), ('LEV', 2.0), ('INV', -1.0), ('SPTI', 0.0)]:
+        close = 100 * np.cumprod(1 + gearing * index_returns)
+        pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1.0},
+                     index=dates).to_csv(tmp_path / f'{ticker}.csv')
+    return LocalProvider(str(tmp_path))
+
+
+def test_market_risk_free_constituent_is_one_stock(local):
+    market = Market(['msft', 'spti'], start='2020-01-01', end='2020-02-01', provider=local)
+    assert market.risk_free is market.stocks[1]
+    bars = local.history('SPTI', '2020-02-01', '2020-03-01')
+    market.append_bars({'SPTI': bars})
+    market.panel
+    assert market.risk_free.history.index[-1] == bars.index[-1]
+    assert market.stocks[1].max['close'] == bars['Close'].max()
+
+
+def test_market_betas_against_benchmark(geared):
+    market = Market(['lev', 'inv'], start='2020-01-01', end='2021-01-01', provider=geared)
+    betas = market.betas('idx')
+    assert betas.loc['LEV', 'beta'] == pytest.approx(2.0)
+    assert betas.loc['INV', 'beta'] == pytest.approx(-1.0)
+    assert betas['r_squared'].tolist() == pytest.approx([1.0, 1.0])
+    assert market.stocks[0].beta == pytest.approx(2.0)
+    assert market.stocks[1].alpha == pytest.approx(0.0, abs=1e-12)
+    assert market.betas('idx') is betas
+    market.stocks[0].calculate_stats()
+    assert market.stocks[0].beta == pytest.approx(2.0)
+    assert market.stocks[0].alpha == pytest.approx(0.0, abs=1e-12)
+    # The regression no longer covers the history once bars are appended
+    market.append_bars({'LEV': market.stocks[0]._load().iloc[-1:].shift(1, freq='D')})
+    assert market.stocks[0].beta is None and market.stocks[0].alpha is None and market.stocks[0].r_squared is None
+
+
+def test_market_betas_lookback_and_frequency(geared):
+    market = Market(['idx', 'lev'], start='2020-01-01', end='2021-01-01', provider=geared)
+    weekly = market.betas('idx', lookback=20, frequency='W')
+    assert weekly.loc['LEV', 'beta'] == pytest.approx(2.0, rel=0.05)
+    assert weekly.loc['LEV', 'beta'] != pytest.approx(2.0, rel=1e-9)
+    equal_weight = market.betas()
+    assert equal_weight.loc['LEV', 'beta'] == pytest.approx(4 / 3, )
+
+
+def test_market_stat_matrix(local):
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=local)
+    matrix = market.stat_matrix()
+    assert list(matrix.index) == ['MSFT', 'TSLA']
+    assert matrix.loc['TSLA', ('variance', 'close')] == pytest.approx(market.stocks[1].variance['close'])
+    assert matrix.loc['MSFT', ('return_pct', '')] == pytest.approx(market.stocks[0].return_pct)
+    assert market.stat_matrix() is matrix
+    avg, var, std, ret = market.mkt_stats(market.stocks, 'high')
+    assert avg == pytest.approx(market.average['high'])
+    assert std == pytest.approx(market.std_dev['high'])
+    assert ret == pytest.approx(market.raw_return_pct)
+    assert market.mkt_stats(market.stocks[:1], 'open')[0] == pytest.approx(market.stocks[0].average['open'])
+
+
+def test_returns_are_memoized(local):
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=local)
+    stock = market.stocks[0]
+    daily = stock.returns()
+    assert stock.returns() is daily
+    assert daily.iloc[0] == pytest.approx(12 / 11 - 1)
+    assert stock.returns('cumulative').iloc[-1] == pytest.approx(stock.history['Close'].iloc[-1] / 11 - 1)
+    panel = market.returns('log')
+    assert list(panel.columns) == ['MSFT', 'TSLA'] and market.returns('log') is panel
+    assert panel['TSLA'].equals(market.stocks[1].returns('log'))
+
+
+def test_excess_returns(local):
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=local)
+    excess = market.excess_returns()
+    assert market.excess_returns() is excess
+    expected = market.stocks[1].returns() - market.risk_free.returns()
+    assert excess['TSLA'].to_numpy() == pytest.approx(expected.to_numpy())
+
+
+def test_market_covariance_and_correlation(geared):
+    market = Market(['idx', 'lev', 'inv'], start='2020-01-01', end='2021-01-01', provider=geared)
+    cov = market.covariance()
+    assert market.covariance() is cov
+    assert cov.loc['LEV', 'IDX'] == pytest.approx(2 * cov.loc['IDX', 'IDX'])
+    corr = market.correlation('2020-06-01', '2020-07-01')
+    assert corr.loc['INV', 'IDX'] == pytest.approx(-1.0)
+    shrunk = market.covariance(shrinkage=True)
+    assert shrunk.shape == (3, 3) and shrunk is not cov
+
+
+def test_rolling_stats(local):
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-03-01', provider=local)
+    stock = market.stocks[1]
+    rolling = stock.rolling_stats([5, 20])
+    assert stock.rolling_stats([5, 20]) is rolling
+    assert rolling[(5, 'average', 'close')].iloc[-1] == pytest.approx(stock.history['Close'].iloc[-5:].mean())
+    assert rolling[(20, 'max', 'high-low')].iloc[-1] == 3
+    batch = market.rolling_stats('close', [5])
+    assert batch[(5, 'min', 'TSLA')].equals(rolling[(5, 'min', 'close')].rename((5, 'min', 'TSLA')))
+
+
+def test_pony_metrics(geared):
+    pony = Pony('inv', ['idx', 'lev'], start='2020-01-01', end='2021-01-01', provider=geared)
+    metrics = pony.metrics
+    assert pony.metrics is metrics
+    # The market's equal-weighted return is 1.5 times IDX's and the risk-free price never moves
+    assert metrics['beta'] == pytest.approx(-2 / 3)
+    assert metrics['jensens_alpha'] == pytest.approx(0, abs=1e-3)
+    assert metrics['tracking_error'] > 0
+
+
+def test_market_performance_batch(geared):
+    market = Market(['idx', 'lev'], start='2020-01-01', end='2021-01-01', provider=geared)
+    candidates = [Stock(t, '2020-01-01', '2021-01-01', provider=geared) for t in ['inv', 'idx']]
+    result = market.performance(candidates)
+    assert list(result.index) == ['INV', 'IDX']
+    assert result.loc['INV', 'beta'] == pytest.approx(-2 / 3)
+    assert result.loc['IDX', 'sharpe'] == pytest.approx(market.performance().loc['IDX', 'sharpe'])
+    assert market.performance() is market.performance()
+    # Built on the memoized excess returns rather than subtracting the risk-free returns again
+    assert market._stats['excess_returns'] is market.excess_returns()
+    assert market.market_excess_returns is market.market_excess_returns
+
+
+def test_pony_reuses_a_built_market(geared):
+    market = Market(['idx', 'lev'], start='2020-01-01', end='2021-01-01', provider=geared)
+    pony = Pony('lev', market)
+    assert pony.market is market and pony.stock is market.stocks[1]
+    assert pony.start_date == '2020-01-01' and pony.risk_free == 'SPTI'
+
+
+def test_pony_batch(geared):
+    counting = CountingProvider(geared.directory)
+    market = Market(['idx', 'lev'], start='2020-01-01', end='2021-01-01', provider=counting)
+    before = len(counting.calls)
+    scores = Pony.batch(['inv', 'lev', 'spti'], market, workers=2)
+    assert list(scores.index) == ['INV', 'LEV', 'SPTI']
+    assert counting.calls[before:] == [('history', 'INV')]
+    assert scores.loc['INV', 'beta'] == pytest.approx(Pony('inv', market).metrics['beta'])
+    assert scores.loc['LEV', 'sharpe'] == pytest.approx(market.performance().loc['LEV', 'sharpe'])
+    with pytest.raises(ValueError):
+        Pony.batch(['inv'], market, workers=0)
+
+
+def test_pony_batch_builds_market_once(geared):
+    scores = Pony.batch(['inv'], ['idx', 'lev'], start='2020-01-01', end='2021-01-01', provider=geared)
+    assert scores.loc['INV', 'beta'] == pytest.approx(-2 / 3)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from conftest import make_histories
+from stocker.outofcore import DaskMarket
+from stocker.stocker import Market
+
+
+@pytest.fixture
+def local_histories():
+    rng = np.random.default_rng(19)
+    histories = make_histories(['A', 'B', 'C', 'D', 'E', 'SPTI'], end='2020-04-01')
+    for i, (t, history) in enumerate(histories.items()):
+        history['Close'] += rng.normal(0, 1, len(history))
+        # Staggered starts and a gap, so partitions do not share all their dates
+        histories[t] = history.iloc[2 * i:]
+    histories['C'] = histories['C'].drop(histories['C'].index[10])
+    return histories
+
+
+def markets(local):
+    symbols = ['a', 'b', 'c', 'd', 'e']
+    market = Market(symbols, start='2020-01-01', end='2020-04-01', provider=local)
+    dask_market = DaskMarket(symbols, start='2020-01-01', end='2020-04-01', provider=local, partition_size=2)
+    return market, dask_market
+
+
+def test_nothing_loaded_until_used(local):
+    plain, market = markets(local)
+    assert market.partitions() == [['A', 'B'], ['C', 'D'], ['E']]
+    assert all(s._history is None for s in market.stocks)
+    market.calculate_stats(processes=2)
+    assert all(s._history is None for s in market.stocks)
+    assert 'columns' in market.stocks[4]._stats
+    assert market.average == pytest.approx(plain.average)
+
+
+def test_stats_match_market(local):
+    market, dask_market = markets(local)
+    for family in ['average', 'variance', 'std_dev']:
+        assert getattr(dask_market, family) == pytest.approx(getattr(market, family))
+    assert dask_market.raw_return_pct == pytest.approx(market.raw_return_pct)
+    assert dask_market.mkt_stats(dask_market.stocks, 'close') == pytest.approx(market.mkt_stats(market.stocks, 'close'))
+
+
+def test_returns_and_matrices_match_market(local):
+    market, dask_market = markets(local)
+    np.testing.assert_allclose(dask_market.market_returns.to_numpy(), market.market_returns.to_numpy())
+    assert dask_market.market_returns.index.equals(market.market_returns.index)
+    np.testing.assert_allclose(dask_market.covariance().to_numpy(), market.covariance().to_numpy())
+    np.testing.assert_allclose(dask_market.correlation('2020-02-01').to_numpy(), market.correlation('2020-02-01').to_numpy())
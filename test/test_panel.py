@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from conftest import make_history
+from stocker.panel import *
+from stocker.stocker import Market, Stock
+
+
+@pytest.fixture
+def histories():
+    return {'A': make_history('2020-01-01', '2020-02-01', 10),
+            'B': make_history('2020-01-15', '2020-03-01', 20)}
+
+
+def test_panel_aligns_dates(histories):
+    panel = Panel.from_histories(histories)
+    assert panel.tickers == ['A', 'B']
+    assert panel.values['Close'].shape == (len(panel.dates), 2)
+    assert panel.dates[0] == histories['A'].index[0] and panel.dates[-1] == histories['B'].index[-1]
+    close = panel.field('Close')
+    assert np.isnan(close.loc['2020-01-01', 'B'])
+    assert close.loc['2020-01-15', 'B'] == histories['B'].loc['2020-01-15', 'Close']
+
+
+def test_panel_frames_are_views(histories):
+    panel = Panel.from_histories(histories)
+    frame = panel.frame('B')
+    assert frame.index.equals(histories['B'].index)
+    assert frame['Open'].equals(histories['B']['Open'])
+    assert np.shares_memory(frame['Close'].to_numpy(), panel.values['Close'])
+    assert np.shares_memory(panel.field('Close').to_numpy(), panel.values['Close'])
+
+
+def test_panel_frames_leave_out_gaps(histories):
+    gappy = histories['B'].drop(histories['B'].index[5:8])
+    panel = Panel.from_histories({'A': histories['A'], 'B': gappy})
+    frame = panel.frame('B')
+    assert frame.index.equals(gappy.index)
+    member = Stock('B', start='2020-01-15', end='2020-03-01', history=frame)
+    standalone = Stock('B', start='2020-01-15', end='2020-03-01', history=gappy)
+    assert len(member.history) == len(standalone.history)
+    assert member.rolling_stats([5]).equals(standalone.rolling_stats([5]))
+
+
+def test_market_stocks_share_the_panel(local):
+    market = Market(['msft', 'tsla'], start='2020-01-01', end='2020-02-01', provider=local)
+    assert market.panel.tickers == ['MSFT', 'TSLA', 'SPTI']
+    assert np.shares_memory(market.stocks[1].history['Close'].to_numpy(), market.panel.values['Close'])
+    market.average
+    market.append_bars({'MSFT': local.history('MSFT', '2020-02-01', '2020-03-01')})
+    panel = market.panel
+    assert np.shares_memory(market.stocks[0]._load()['Close'].to_numpy(), panel.values['Close'])
+    assert len(market.stocks[0].history) > len(market.stocks[1].history)
+    assert market.closes().columns.tolist() == ['MSFT', 'TSLA']
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from conftest import make_history
+from stocker.panel import Panel
+from stocker.parallel import *
+from stocker.providers import LocalProvider
+from stocker.stocker import Market, Stock
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(6)
+    histories = {}
+    for i in range(9):
+        history = make_history('2020-01-01', '2020-06-01', offset=10 * (i + 1))
+        history['Close'] += rng.normal(0, 1, len(history))
+        histories[f'T{i}'] = history.iloc[i:len(history) - i]
+    return Panel.from_histories(histories)
+
+
+def test_matches_serial_stats(panel):
+    tickers = ['T8', 'T0', 'T4', 'T5']
+    results = parallel_column_stats(panel, tickers, Stock.stat_keys, processes=2)
+    for ticker, (stats, return_pct) in zip(tickers, results):
+        stock = Stock(ticker, history=panel.frame(ticker), provider=LocalProvider('.'))
+        np.testing.assert_allclose(stats.variance, stock.column_stats.variance)
+        np.testing.assert_array_equal(stats.max, stock.column_stats.max)
+        assert return_pct == pytest.approx(stock.return_pct)
+
+
+@pytest.mark.parametrize('local_histories', [['A', 'B', 'C', 'SPTI']], indirect=True)
+def test_market_parallel_stats(local):
+    serial = Market(['a', 'b', 'c'], start='2020-01-01', end='2020-03-01', provider=local)
+    market = Market(['a', 'b', 'c'], start='2020-01-01', end='2020-03-01', provider=local)
+    market.calculate_stats(processes=2)
+    assert 'columns' in market.stocks[2]._stats
+    for family in ['average', 'variance', 'std_dev']:
+        assert getattr(market, family) == pytest.approx(getattr(serial, family))
+    assert market.raw_return_pct == pytest.approx(serial.raw_return_pct)
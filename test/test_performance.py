@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from stocker.performance import *
+
+
+def test_metrics_match_direct_formulas():
+    rng = np.random.default_rng(5)
+    market = rng.normal(0.0005, 0.01, 500)
+    risk_free = np.full(500, 0.0001)
+    returns = np.column_stack([0.0002 + 1.2 * market + rng.normal(0, 0.005, 500), rng.normal(0.001, 0.02, 500)])
+    returns[:20, 1] = np.nan
+    metrics = performance_metrics(returns - risk_free[:, None], market - risk_free)
+    assert set(metrics) == set(PERFORMANCE_METRICS)
+
+    r, m, rf = returns[20:, 1], market[20:], risk_free[20:]
+    e, me, a = r - rf, m - rf, r - m
+    beta = np.cov(e, me)[0, 1] / np.var(me, ddof=1)
+    assert metrics['beta'][1] == pytest.approx(beta)
+    assert metrics['sharpe'][1] == pytest.approx(e.mean() / e.std(ddof=1) * np.sqrt(252))
+    assert metrics['sortino'][1] == pytest.approx(e.mean() / np.sqrt(np.mean(np.minimum(e, 0) ** 2)) * np.sqrt(252))
+    assert metrics['treynor'][1] == pytest.approx(e.mean() * 252 / beta)
+    assert metrics['jensens_alpha'][1] == pytest.approx((e.mean() - beta * me.mean()) * 252)
+    assert metrics['tracking_error'][1] == pytest.approx(a.std(ddof=1) * np.sqrt(252))
+    assert metrics['information_ratio'][1] == pytest.approx(a.mean() * 252 / (a.std(ddof=1) * np.sqrt(252)))
+    assert metrics['beta'][0] == pytest.approx(1.2, rel=0.05)
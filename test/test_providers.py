@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from conftest import FakeDownloader, make_history
+from stocker.providers import *
+
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def test_batch_download_single_request():
+    fake = FakeDownloader()
+    histories = batch_download(['MSFT', 'TSLA', 'MSFT'], '2020-01-01', '2020-02-01', fake)
+    assert fake.calls == [['MSFT', 'TSLA']]
+    assert list(histories) == ['MSFT', 'TSLA']
+    assert list(histories['TSLA'].columns) == FIELDS
+
+
+def test_batch_download_drops_missing_dates():
+    def downloader(tickers, start, end, group_by):
+        frame = FakeDownloader()(tickers, start, end, group_by)
+        frame.loc[frame.index[:3], 'TSLA'] = np.nan
+        return frame
+    histories = batch_download(['MSFT', 'TSLA'], '2020-01-01', '2020-02-01', downloader)
+    assert len(histories['TSLA']) == len(histories['MSFT']) - 3
+
+
+def test_yahoo_provider_single_history():
+    fake = FakeDownloader()
+    history = YahooProvider(fake).history('MSFT', '2020-01-01', '2020-02-01')
+    assert fake.calls == [['MSFT']]
+    assert list(history.columns) == FIELDS
+
+
+@pytest.mark.parametrize('ext', ['csv', 'parquet'])
+def test_local_provider_reads_range(tmp_path, ext):
+    if ext == 'parquet':
+        pytest.importorskip('pyarrow')
+    history = make_history()
+    getattr(history, 'to_' + ext)(tmp_path / f'MSFT.{ext}')
+    provider = LocalProvider(str(tmp_path))
+    result = provider.history('MSFT', '2020-01-06', '2020-01-10')
+    assert list(result.index.strftime('%Y-%m-%d')) == ['2020-01-06', '2020-01-07', '2020-01-08', '2020-01-09']
+    assert result['Open'].iloc[0] == history.loc['2020-01-06', 'Open']
+    assert provider.info('MSFT') == {}
+
+
+def test_local_provider_missing_symbol(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LocalProvider(str(tmp_path)).history('MSFT', '2020-01-01', '2020-02-01')
+
+
+def test_default_provider_can_be_replaced(tmp_path):
+    previous = get_default_provider()
+    local = LocalProvider(str(tmp_path))
+    set_default_provider(local)
+    try:
+        assert get_default_provider() is local
+    finally:
+        set_default_provider(previous)
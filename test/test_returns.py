@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocker.returns import *
+
+
+@pytest.fixture
+def prices():
+    dates = pd.date_range('2020-01-01', periods=5, freq='B')
+    return pd.DataFrame({'A': [100, 110, 99, 99, 108.9], 'B': [50, np.nan, 55, 60.5, np.nan]}, index=dates)
+
+
+def test_simple_returns_bridge_gaps(prices):
+    simple = simple_returns(prices)
+    assert simple.index.equals(prices.index[1:])
+    assert simple['A'].tolist() == pytest.approx([0.1, -0.1, 0.0, 0.1])
+    assert np.isnan(simple['B'].iloc[0]) and np.isnan(simple['B'].iloc[3])
+    assert simple['B'].iloc[1:3].tolist() == pytest.approx([0.1, 0.1])
+
+
+def test_log_and_cumulative(prices):
+    assert log_returns(prices)['A'].iloc[0] == pytest.approx(np.log(1.1))
+    cumulative = cumulative_returns(prices)
+    assert cumulative['A'].iloc[-1] == pytest.approx(108.9 / 100 - 1)
+    assert cumulative['B'].iloc[2] == pytest.approx(60.5 / 50 - 1)
+
+
+def test_price_returns_rejects_unknown_kind(prices):
+    assert price_returns(prices['A'], 'log').equals(log_returns(prices['A']))
+    with pytest.raises(ValueError):
+        price_returns(prices, 'excess')
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocker.rolling import *
+
+
+@pytest.fixture
+def block():
+    rng = np.random.default_rng(4)
+    data = rng.normal(100, 5, (300, 4))
+    data[rng.random(data.shape) < 0.05] = np.nan
+    return data
+
+
+@pytest.mark.parametrize('window', [1, 7, 20, 299, 400])
+@pytest.mark.parametrize('min_periods', [None, 1])
+def test_matches_pandas(block, window, min_periods):
+    rolling = pd.DataFrame(block).rolling(window, min_periods=min_periods)
+    mean, variance, std_dev = rolling_moments(block, window, min_periods)
+    np.testing.assert_allclose(mean, rolling.mean(), rtol=1e-9)
+    np.testing.assert_allclose(variance, rolling.var(), rtol=1e-6, atol=1e-9)
+    np.testing.assert_allclose(std_dev, rolling.std(), rtol=1e-6, atol=1e-9)
+    np.testing.assert_array_equal(rolling_max(block, window, min_periods), rolling.max())
+    np.testing.assert_array_equal(rolling_min(block, window, min_periods), rolling.min())
+
+
+def test_rolling_frame_layout(block):
+    frame = rolling_frame(block, pd.RangeIndex(300), ['a', 'b', 'c', 'd'], [5, 10])
+    assert frame.shape == (300, 2 * 5 * 4)
+    assert frame[(10, 'max', 'c')].equals(pd.Series(rolling_max(block, 10)[:, 2], name=(10, 'max', 'c')))
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import pytest
+
+from conftest import make_histories
+from stocker.snapshot import *
+from stocker.stocker import Market, Pony
+
+
+@pytest.fixture
+def local_histories():
+    return make_histories(['A', 'B', 'C', 'SPTI'])
+
+
+def test_market_round_trip(local, tmp_path):
+    market = Market(['a', 'b'], start='2020-01-01', end='2020-03-01', provider=local)
+    market.calculate_stats()
+    market.covariance()
+    market.stocks[0].max
+    path = str(tmp_path / 'market.snap')
+    save_snapshot(market, path)
+
+    restored = load_snapshot(path)
+    assert isinstance(restored, Market) and restored.tickers == ['A', 'B']
+    assert restored.average == market.average
+    assert restored.covariance().equals(market.covariance())
+    # Nothing is read for a Stock until it is used
+    stock = restored.stocks[0]
+    assert stock._restore is not None and stock._history is None
+    assert stock.max == market.stocks[0].max
+    assert stock._restore is None
+    assert stock._load()['Close'].equals(market.stocks[0]._load()['Close'])
+    assert restored.performance().equals(market.performance())
+
+
+def test_risk_free_constituent_round_trip(local, tmp_path):
+    market = Market(['a', 'spti'], start='2020-01-01', end='2020-03-01', provider=local)
+    market.risk_free.max
+    path = str(tmp_path / 'market.snap')
+    save_snapshot(market, path)
+    restored = load_snapshot(path)
+    assert restored.risk_free is restored.stocks[1]
+    assert restored.risk_free.max == market.risk_free.max
+
+
+def test_pony_round_trip(local, tmp_path):
+    pony = Pony('c', ['a', 'b'], start='2020-01-01', end='2020-03-01', provider=local)
+    metrics = pony.metrics
+    path = str(tmp_path / 'pony.snap')
+    save_snapshot(pony, path)
+    restored = load_snapshot(path)
+    assert isinstance(restored, Pony) and restored.stock.ticker == 'C'
+    assert restored.metrics == pytest.approx(metrics, nan_ok=True)
+    assert restored.stock.return_pct == pytest.approx(pony.stock.return_pct)
+
+
+def test_stale_and_corrupt_snapshots(local, tmp_path):
+    market = Market(['a'], start='2020-01-01', end='2020-03-01', provider=local)
+    market.stocks[0].average
+    path = str(tmp_path / 'market.snap')
+    save_snapshot(market, path)
+    with pytest.raises(SnapshotError):
+        load_snapshot(path, max_age=timedelta(0))
+
+    with open(path, 'r+b') as f:
+        f.seek(-3, 2)
+        byte = f.read(1)
+        f.seek(-3, 2)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    restored = load_snapshot(path)
+    with pytest.raises(SnapshotError):
+        restored.stocks[0].average
+
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 1)
+    with pytest.raises(SnapshotError):
+        load_snapshot(path)
+    with open(path, 'wb') as f:
+        f.write(b'not a snapshot')
+    with pytest.raises(SnapshotError):
+        load_snapshot(path)
+
+
+def test_histories_are_checked_when_first_read(local, tmp_path):
+    market = Market(['a'], start='2020-01-01', end='2020-03-01', provider=local)
+    market.stocks[0].average
+    path = str(tmp_path / 'market.snap')
+    save_snapshot(market, path)
+    with open(path, 'r+b') as f:
+        f.seek(len(MAGIC))
+        # The histories are the first section after the header
+        f.seek(len(MAGIC) + 12 + int.from_bytes(f.read(8), 'little') + 100)
+        byte = f.read(1)
+        f.seek(-1, 1)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    restored = load_snapshot(path)
+    assert restored.stocks[0].average == market.stocks[0].average
+    with pytest.raises(SnapshotError):
+        restored.stocks[0].history
@@ -0,0 +1,52 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from conftest import RecordingProvider, make_history
+from stocker.sqlite import *
+from stocker.stocker import Stock
+
+
+def read_close(path, symbol):
+    return SQLiteStore(path).history(symbol, '2020-01-01', '2020-02-01')['Close'].sum()
+
+
+def test_upsert_and_range_queries(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'prices.db'))
+    history = make_history('2020-01-01', '2020-03-01', 10)
+    store.upsert({'MSFT': history, 'TSLA': make_history('2020-01-01', '2020-03-01', 20)})
+    frame = store.history('MSFT', '2020-01-15', '2020-02-01')
+    assert frame.index.equals(history.loc['2020-01-15':'2020-01-31'].index)
+    np.testing.assert_array_equal(frame.to_numpy(), history.loc['2020-01-15':'2020-01-31', list(SQLITE_FIELDS)].to_numpy())
+
+    # Rows for stored dates replace the old ones
+    revised = history.iloc[-2:] * 2
+    store.upsert({'MSFT': revised})
+    assert store.history('MSFT', '2020-02-27', '2020-03-01')['Close'].tolist() == revised['Close'].tolist()
+    assert len(store.history('MSFT', '2020-01-01', '2020-04-01')) == len(history)
+    assert store._connect().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert len(store.history('NONE', '2020-01-01', '2020-04-01')) == 0
+
+
+def test_requery_without_network(tmp_path):
+    upstream = RecordingProvider()
+    path = str(tmp_path / 'prices.db')
+    store = SQLiteStore(path, upstream, clock=lambda: datetime(2021, 1, 1))
+    stock = Stock('msft', start='2020-01-01', end='2020-03-01', provider=store)
+    stock.history
+    assert len(upstream.calls) == 1
+    stock.requery_data('2020-01-15', '2020-02-15')
+    assert len(upstream.calls) == 1
+    assert store.coverage('MSFT') == [['2020-01-01', '2020-03-01']]
+
+    offline = Stock('msft', start='2020-01-01', end='2020-03-01', provider=SQLiteStore(path))
+    assert offline.requery_data('2020-02-01', '2020-02-08')['Close'].tolist() == upstream.data.loc['2020-02-03':'2020-02-07', 'Close'].tolist()
+
+
+def test_concurrent_readers(tmp_path):
+    path = str(tmp_path / 'prices.db')
+    SQLiteStore(path).upsert({'MSFT': make_history('2020-01-01', '2020-03-01', 10)})
+    with ProcessPoolExecutor(2) as pool:
+        totals = list(pool.map(read_close, [path] * 4, ['MSFT'] * 4))
+    assert totals == [make_history('2020-01-01', '2020-01-31', 10)['Close'].sum()] * 4
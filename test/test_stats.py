@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stocker.stats import *
+
+
+COLUMNS = ['a', 'b', 'c']
+
+
+@pytest.fixture
+def block():
+    rng = np.random.default_rng(0)
+    return rng.normal(100, 5, size=(10000, 3))
+
+
+def test_matches_pandas(block):
+    stats = ColumnStats.from_block(block, COLUMNS, chunk_rows=333)
+    frame = pd.DataFrame(block, columns=COLUMNS)
+    np.testing.assert_allclose(stats.mean, frame.mean())
+    np.testing.assert_allclose(stats.variance, frame.var())
+    np.testing.assert_allclose(stats.std_dev, frame.std())
+    np.testing.assert_array_equal(stats.max, frame.max())
+    np.testing.assert_array_equal(stats.min, frame.min())
+
+
+def test_skips_missing_values(block):
+    block[::7, 0] = np.nan
+    block[:, 2] = np.nan
+    block[5, 2] = 1.0
+    stats = ColumnStats.from_block(block, COLUMNS, chunk_rows=1000)
+    frame = pd.DataFrame(block, columns=COLUMNS)
+    np.testing.assert_allclose(stats.mean, frame.mean())
+    np.testing.assert_allclose(stats.variance, frame.var())
+    assert stats.count.tolist() == frame.count().tolist()
+    assert np.isnan(stats.variance[2]) and stats.max[2] == 1.0
+
+
+def test_merge_equals_whole(block):
+    whole = ColumnStats.from_block(block, COLUMNS)
+    merged = ColumnStats.from_block(block[:1234], COLUMNS).merge(ColumnStats.from_block(block[1234:], COLUMNS))
+    np.testing.assert_allclose(merged.variance, whole.variance)
+    np.testing.assert_allclose(merged.mean, whole.mean)
+
+
+def test_empty():
+    stats = ColumnStats.from_block(np.empty((0, 3)), COLUMNS)
+    assert np.isnan(stats.mean).all() and np.isnan(stats.max).all()
+    assert stats.to_dict('average').keys() == set(COLUMNS)
+
+
+def test_market_model_recovers_coefficients():
+    rng = np.random.default_rng(1)
+    benchmark = rng.normal(0, 0.01, 500)
+    noise = rng.normal(0, 0.01, 500)
+    returns = np.column_stack([0.001 + 1.5 * benchmark, -0.5 * benchmark + noise])
+    returns[:10, 1] = np.nan
+    alpha, beta, r2 = market_model(returns, benchmark)
+    assert alpha[0] == pytest.approx(0.001) and beta[0] == pytest.approx(1.5) and r2[0] == pytest.approx(1)
+    expected = np.polyfit(benchmark[10:], returns[10:, 1], 1)
+    assert beta[1] == pytest.approx(expected[0]) and alpha[1] == pytest.approx(expected[1])
+    assert 0 < r2[1] < 1
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from conftest import make_history
+from stocker.panel import Panel
+from stocker.providers import LocalProvider
+from stocker.store import *
+from stocker.stocker import Market, Stock
+
+
+@pytest.fixture
+def panel():
+    return Panel.from_histories({'A': make_history('2020-01-01', '2020-03-01', 10),
+                                 'B': make_history('2020-01-15', '2020-04-01', 20),
+                                 'C': make_history('2020-02-01', '2020-04-01', 30),
+                                 'SPTI': make_history('2020-01-01', '2020-04-01', 40)})
+
+
+def test_round_trip(panel, tmp_path):
+    store = MemmapStore.write(panel, str(tmp_path / 'store'))
+    reopened = MemmapStore(str(tmp_path / 'store'))
+    assert reopened.tickers == panel.tickers
+    assert reopened.panel_data.dates.equals(panel.dates)
+    assert isinstance(reopened.panel_data.values['Close'], np.memmap)
+    for field in panel.fields:
+        np.testing.assert_array_equal(reopened.panel_data.values[field], panel.values[field])
+    frame = store.history('B', '2020-02-01', '2020-03-01')
+    expected = panel.frame('B').loc['2020-02-01':'2020-02-29']
+    assert frame.index.equals(expected.index)
+    np.testing.assert_array_equal(frame['Close'].to_numpy(), expected['Close'].to_numpy())
+    with pytest.raises(KeyError):
+        store.history('ZZZ', '2020-01-01', '2020-02-01')
+
+
+def test_stock_history_is_a_view(panel, tmp_path):
+    store = MemmapStore.write(panel, str(tmp_path))
+    stock = Stock('c', start='2020-01-01', end='2020-04-01', provider=store)
+    assert np.shares_memory(stock.history['Close'].to_numpy(), store.panel_data.values['Close'])
+    assert stock.history.index[0] == panel.dates[panel.bounds[2][0]]
+    reference = Stock('c', start='2020-01-01', end='2020-04-01', history=panel.frame('C').loc[:'2020-03-31'], provider=LocalProvider('.'))
+    assert stock.average == pytest.approx(reference.average)
+
+
+def test_market_opens_store(panel, tmp_path):
+    store = MemmapStore.write(panel, str(tmp_path))
+    market = Market(['a', 'b', 'c'], start='2020-01-01', end='2020-04-01', provider=store)
+    assert np.shares_memory(market.panel.values['Open'], store.panel_data.values['Open'])
+    # No Stock's frame is made until it is used
+    assert all(s._history is None for s in market.stocks)
+    assert np.shares_memory(market.stocks[1]._load()['Open'].to_numpy(), store.panel_data.values['Open'])
+    # Tickers stored apart are read into a panel of their own
+    subset = Market(['c', 'a'], start='2020-02-01', end='2020-03-01', provider=store)
+    assert subset.panel.values['Close'].flags.f_contiguous
+    np.testing.assert_array_equal(subset.closes()['A'].to_numpy(), panel.frame('A').loc['2020-02-01':, 'Close'].to_numpy())
+    assert subset.average == pytest.approx(Market(['c', 'a'], start='2020-02-01', end='2020-03-01', provider=PanelProvider(panel)).average)
+
+
+class PanelProvider(LocalProvider):
+    def __init__(self, panel):
+        self.data = panel
+
+    def history(self, symbol, start, end):
+        return self.data.subset([symbol], start, end).frame(symbol).dropna(how='all')